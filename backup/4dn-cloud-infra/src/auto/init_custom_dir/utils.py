@@ -7,7 +7,7 @@
 #   - filesystem via:
 #     - glob.glob
 #     - io.open
-#     - os.listdir
+#     - os.scandir
 #     - os.path.basename
 #     - os.path.isdir
 #     - os.path.join
@@ -15,18 +15,22 @@
 #   - shell via:
 #     - subprocess.check_output (to execute test_cred.sh)
 
-import binascii # TODO: add to pyproject.toml dependencies?
+import functools
+import hashlib
 import io
 import json
 import os
-import pbkdf2 # TODO: add to pyproject.toml dependencies?
 import secrets 
 import string 
 import subprocess
+import sys
 
 from   dcicutils.misc_utils import json_leaf_subst as expand_json_template
 from   .defs import Files
 
+# Single (OS entropy based) random generator instance for drawing multiple random choices at once.
+_SYSTEM_RANDOM = secrets.SystemRandom()
+
 
 def expand_json_template_file(template_file: str, output_file: str, template_substitutions: dict):
     """
@@ -44,6 +48,18 @@ def expand_json_template_file(template_file: str, output_file: str, template_sub
         json.dump(expanded_template_json, output_f, indent=2)
         output_f.write("\n")
 
+@functools.lru_cache(maxsize=1)
+def load_system_words() -> tuple:
+    """
+    Returns the words from the system words dictionary file; read just once and cached.
+    :returns: A tuple of the system dictionary words; empty if the file cannot be read.
+    """
+    try:
+        with open(Files.SYSTEM_WORDS_DICTIONARY_FILE) as system_words_f:
+            return tuple(word.strip() for word in system_words_f)
+    except Exception:
+        return ()
+
 def generate_s3_encrypt_key() -> str:
     """ Generate a cryptographically secure encryption key suitable for AWS S3 encryption.
         References:
@@ -55,22 +71,19 @@ def generate_s3_encrypt_key() -> str:
         #
         # Will suggests using a password from some (4) random words.
         #
-        password = ""
-        if os.path.isfile(Files.SYSTEM_WORDS_DICTIONARY_FILE):
-            try:
-                with open(system_words_file) as system_words_f:
-                    words = [word.strip() for word in system_words_f]
-                    password = "".join(secrets.choice(words) for i in range(4))
-            except Exception as e:
-                pass
+        words = load_system_words()
+        password = "".join(_SYSTEM_RANDOM.sample(words, 4)) if len(words) >= 4 else ""
         #
         # As fallback, and in any case, tack on a random token.
         #
         return password + secrets.token_hex(16)
     password = generate_password()
     password_salt = os.urandom(16)
-    s3_encrypt_key = pbkdf2.PBKDF2(password, password_salt).read(16)
-    s3_encrypt_key = binascii.hexlify(s3_encrypt_key).decode("utf-8")
+    # Same derivation as generate_encryption_key in utils/misc_utils, i.e. HMAC-SHA256 with 100,000 iterations;
+    # a 16-byte key, i.e. 32 characters as hex, as before.
+    s3_encrypt_key = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), password_salt,
+                                         iterations=100_000, dklen=16)
+    s3_encrypt_key = s3_encrypt_key.hex()
     return s3_encrypt_key
 
     # Second try:
@@ -108,7 +121,7 @@ def obfuscate(value: str) -> str:
     :param value: The value to obfuscate.
     :returns: The obfuscated value or empty string if not a string or empty.
     """
-    return value[0] + "********" if isinstance(value, str) else ""
+    return value[0] + "********" if value and isinstance(value, str) else ""
 
 def confirm_with_user(message: str):
     """
@@ -127,7 +140,7 @@ def exit_with_no_action(message: str = "", status: int = 0):
     if message:
         print(message)
     print("Exiting without doing anything.")
-    exit(status)
+    sys.exit(status)
 
 def print_directory_tree(directory: str):
     """
@@ -137,13 +150,14 @@ def print_directory_tree(directory: str):
     """
     def tree_generator(directory: str, prefix: str = ""):
         space = "    " ; branch = "│   " ; tee = "├── " ; last = "└── "
-        contents = [os.path.join(directory, item) for item in sorted(os.listdir(directory))]
-        pointers = [tee] * (len(contents) - 1) + [last]
-        for pointer, path in zip(pointers, contents):
-            symlink = "@ ─> " + os.readlink(path) if os.path.islink(path) else ""
-            yield prefix + pointer + os.path.basename(path) + symlink
-            if os.path.isdir(path):
+        with os.scandir(directory) as entries:
+            contents = sorted(entries, key=lambda entry: entry.name)
+        for index, entry in enumerate(contents):
+            pointer = last if index == len(contents) - 1 else tee
+            symlink = "@ ─> " + os.readlink(entry.path) if entry.is_symlink() else ""
+            yield prefix + pointer + entry.name + symlink
+            if entry.is_dir():
                 extension = branch if pointer == tee else space 
-                yield from tree_generator(path, prefix=prefix+extension)
+                yield from tree_generator(entry.path, prefix=prefix+extension)
     print("└─ " + directory)
     for line in tree_generator(directory, prefix="   "): print(line)
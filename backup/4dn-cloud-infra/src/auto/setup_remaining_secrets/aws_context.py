@@ -2,6 +2,13 @@ import boto3
 from collections import namedtuple
 import contextlib
 import os
+import threading
+
+
+# Named tuple type for the credentials info yielded by AwsContext.establish_credentials;
+# defined once here at module level rather than constructed anew on each yield.
+AwsCreds = namedtuple("AwsCreds", "access_key_id secret_access_key default_region account_number user_arn")
+
 
 class AwsContext:
     """
@@ -42,6 +49,32 @@ class AwsContext:
         self._aws_secret_access_key = aws_secret_access_key
         self._aws_default_region = aws_default_region
         self._reset_boto3_default_session = True
+        self._credentials = None
+        self._boto3_clients = {}
+        self._boto3_lock = threading.Lock()
+
+    def _require_credentials(self) -> None:
+        """
+        Raises an exception if AWS credentials have not been established, i.e. if we are
+        not currently within the context of the establish_credentials context manager.
+        """
+        if not self._credentials:
+            raise Exception("AWS credentials not established.")
+
+    def _client(self, service_name: str):
+        """
+        Returns a boto3 client for the given AWS service name; cached for the life of the
+        current established credentials context. Creation is serialized because boto3
+        sessions (including the default one) are not thread-safe, though the clients are.
+
+        :param service_name: AWS service name (e.g. secretsmanager).
+        :return: boto3 client for the given AWS service name.
+        """
+        with self._boto3_lock:
+            client = self._boto3_clients.get(service_name)
+            if not client:
+                client = self._boto3_clients[service_name] = boto3.client(service_name)
+            return client
 
     @contextlib.contextmanager
     def establish_credentials(self):
@@ -57,6 +90,13 @@ class AwsContext:
         :return: Yields named tuple with: access_key_id, secret_access_key, default_region, account_number, user_arn.
         """
 
+        # If credentials are already established (i.e. we are nested within an outer context
+        # of this same object) then just reuse them; this leaves the environment untouched,
+        # which also makes it safe to call (nested) from multiple threads concurrently.
+        if self._credentials:
+            yield self._credentials
+            return
+
         # TODO: Should we require all credentials, INCLUDING region, to come from EITHER
         # given arguments (i.e. command-line, ultimately) XOR from given AWS credentials
         # directory? I.e. so as not to split between them which may create some confusion.
@@ -118,8 +158,7 @@ class AwsContext:
                     os.environ["AWS_CONFIG_FILE"] = aws_config_file
 
             # Setup AWS boto3 session/client to get basic AWS credentials info;
-            # and serves to test those credentials as well.
-            # TODO: What exactly to do on error. Just raise exception?
+            # and serves to test those credentials as well; any error here is raised to the caller.
             session = boto3.session.Session()
             credentials = session.get_credentials()
             access_key_id = credentials.access_key
@@ -130,15 +169,16 @@ class AwsContext:
             user_arn = caller_identity["Arn"]
 
             # Yield pertinent AWS credentials info for caller in case they need/want them. 
-            yield namedtuple("aws", "access_key_id secret_access_key default_region account_number user_arn") \
-                            (access_key_id=access_key_id,
-                             secret_access_key=secret_access_key,
-                             default_region=default_region,
-                             account_number=account_number,
-                             user_arn=user_arn)
-        except Exception as e:
-            # TODO: Raise exception? Or just let exception trigger (i.e. don't catch)?
-            PRINT(f"EXCEPTION! {str(e)}")
+            self._credentials = AwsCreds(access_key_id=access_key_id,
+                                         secret_access_key=secret_access_key,
+                                         default_region=default_region,
+                                         account_number=account_number,
+                                         user_arn=user_arn)
+            # N.B. No exceptions are caught here, neither from setting up the credentials above
+            # nor from the caller's work within this context; they are raised to the caller.
+            yield self._credentials
         finally:
             # Restore any deleted/modified AWS credentials related environment variables.
+            self._credentials = None
+            self._boto3_clients.clear()
             restore_environ(saved_environ)
@@ -1,4 +1,3 @@
-import boto3
 import json
 import re
 from dcicutils.misc_utils import PRINT
@@ -6,6 +5,12 @@ from .aws_context import AwsContext
 from .utils import (obfuscate, should_obfuscate)
 
 class AwsFunctions(AwsContext):
+    """
+    AWS functions for setting up the remaining secrets; these must all be called from within
+    the context of establish_credentials, and share its (cached) boto3 clients.
+    """
+
+    _DEACTIVATED_SECRET_VALUE_PREFIX = "DEACTIVATED:"
 
     def get_secret_value(self, secret_name: str, secret_key_name: str) -> str:
         """
@@ -16,12 +21,12 @@ class AwsFunctions(AwsContext):
         :param secret_key_name: AWS secret key name.
         :return: Secret key value if found or None if not found.
         """
-        with super().establish_credentials():
-            secrets_manager = boto3.client('secretsmanager')
-            secret_values = secrets_manager.get_secret_value(SecretId=secret_name)
-            secret_values_json = json.loads(secret_values["SecretString"])
-            secret_key_value = secret_values_json.get(secret_key_name)
-            return secret_key_value
+        self._require_credentials()
+        secrets_manager = self._client('secretsmanager')
+        secret_values = secrets_manager.get_secret_value(SecretId=secret_name)
+        secret_values_json = json.loads(secret_values["SecretString"])
+        secret_key_value = secret_values_json.get(secret_key_name)
+        return secret_key_value
 
     def update_secret_key_value(self,
                                 secret_name: str,
@@ -34,6 +39,7 @@ class AwsFunctions(AwsContext):
         If the given secret key value is None then the given secret key will be "deactivated",
         where this means that its old value will be prepended with the string "DEACTIVATED:".
         This is a command-line interactive process, prompting the user for info/confirmation.
+        Thin wrapper around update_secret_keys for a single secret key.
 
         :param secret_name: AWS secret name.
         :param secret_key_name: AWS secret key name to update.
@@ -41,63 +47,83 @@ class AwsFunctions(AwsContext):
         :param show: True to show in plaintext any displayed secret values. 
         :return: True if succeeded otherwise false.
         """
-        with super().establish_credentials():
-            secrets_manager = boto3.client('secretsmanager')
+        return self.update_secret_keys(secret_name, {secret_key_name: secret_key_value}, show)
+
+    def update_secret_keys(self, secret_name: str, secret_keys: dict, show: bool = False) -> bool:
+        """
+        Updates the AWS secret values for all of the given secret key names/values within the given
+        secret name; the secret is read once, all changes are applied to it in memory, the user is
+        asked to confirm the whole set of changes, and the secret is then written back once.
+        If a given secret key value does not yet exist it will be created.
+        If a given secret key value is None then that secret key will be "deactivated",
+        where this means that its old value will be prepended with the string "DEACTIVATED:".
+        This is a command-line interactive process, prompting the user for info/confirmation.
+
+        :param secret_name: AWS secret name.
+        :param secret_keys: Dictionary of AWS secret key names/values to update.
+        :param show: True to show in plaintext any displayed secret values.
+        :return: True if succeeded otherwise false.
+        """
+
+        def print_secret_value(prefix: str, secret_key_name: str, secret_key_value: str, plaintext: bool) -> None:
+            display_secret_key_value = secret_key_value if plaintext else obfuscate(secret_key_value)
+            PRINT(f"{prefix} value of AWS secret {secret_name}.{secret_key_name}: {display_secret_key_value}")
+
+        self._require_credentials()
+        secrets_manager = self._client('secretsmanager')
+        try:
+            # To update individual secret key values we need to get the entire JSON
+            # associated with the given secret name, update the specific elements for
+            # the given secret key names with the new given values, and write the updated
+            # JSON back (once) as the secret value for the given secret name.
             try:
-                # To update an individual secret key value we need to get the entire JSON
-                # associated with the given secret name, update the specific element for
-                # the given secret key name with the new given value, and write the updated
-                # JSON back as the secret value for the given secret name.
-                try:
-                    secret_value = secrets_manager.get_secret_value(SecretId=secret_name)
-                except:
-                    PRINT(f"AWS secret name does not exist: {secret_name}")
-                    return False
-                secret_value_json = json.loads(secret_value["SecretString"])
+                secret_value = secrets_manager.get_secret_value(SecretId=secret_name)
+            except:
+                PRINT(f"AWS secret name does not exist: {secret_name}")
+                return False
+            secret_value_json = json.loads(secret_value["SecretString"])
+            secret_keys_to_update = {}
+            for secret_key_name, secret_key_value in secret_keys.items():
                 secret_key_value_current = secret_value_json.get(secret_key_name)
+                # Check for a no-op update up front, before any prompting.
+                if secret_key_value is not None and secret_key_value_current == secret_key_value:
+                    PRINT(f"Value of new AWS secret {secret_name}.{secret_key_name} is the same as the current one. Nothing to update.")
+                    continue
                 if secret_key_value is None:
                     if secret_key_value_current is None:
                         PRINT(f"AWS secret {secret_name}.{secret_key_name} does not exist. Nothing to deactivate.")
-                        return False
+                        continue
                     action = "deactivate"
+                    secret_key_value = self._DEACTIVATED_SECRET_VALUE_PREFIX + secret_key_value_current
                 else:
+                    # Determine (and if need be ask) just once per secret key whether
+                    # or not to show its current and new values in plaintext.
+                    plaintext = show or not should_obfuscate(secret_key_name)
+                    if not plaintext:
+                        PRINT(f"Value of AWS secret looks like it is sensitive: {secret_name}.{secret_key_name}")
+                        plaintext = input("Show in plaintext? [yes/no] ").strip().lower() == "yes"
                     if secret_key_value_current is None:
                         PRINT(f"AWS secret {secret_name}.{secret_key_name} does not yet exist.")
                         action = "create"
                     else:
-                        if should_obfuscate(secret_key_name) and not show:
-                            PRINT(f"Current value of AWS secret looks like it is sensitive: {secret_name}.{secret_key_name}")
-                            yes_or_no = input("Show in plaintext? [yes/no] ").strip().lower()
-                            if yes_or_no == "yes":
-                                PRINT(f"Current value of AWS secret {secret_name}.{secret_key_name}: {secret_key_value_current}")
-                            else:
-                                PRINT(f"Current value of AWS secret {secret_name}.{secret_key_name}: {obfuscate(secret_key_value_current)}")
-                        else:
-                            PRINT(f"Current value of AWS secret {secret_name}.{secret_key_name}: {secret_key_value_current}")
+                        print_secret_value("Current", secret_key_name, secret_key_value_current, plaintext)
                         action = "update"
-                    if secret_key_value_current == secret_key_value:
-                        PRINT("Value of new AWS secret is the same as the current one. Nothing to update.")
-                        return False
-                    if should_obfuscate(secret_key_name) and not show:
-                        PRINT(f"New value of AWS secret looks like it is sensitive: {secret_name}.{secret_key_name}")
-                        yes_or_no = input("Show in plaintext? [yes/no] ").strip().lower()
-                        if yes_or_no == "yes":
-                            PRINT(f"New value of AWS secret {secret_name}.{secret_key_name}: {secret_key_value}")
-                        else:
-                            PRINT(f"New value of AWS secret {secret_name}.{secret_key_name}: {obfuscate(secret_key_value)}")
-                    else:
-                        PRINT(f"New value of AWS secret {secret_name}.{secret_key_name}: {secret_key_value}")
-                yes_or_no = input(f"Are you sure you want to {action} AWS secret {secret_name}.{secret_key_name}? [yes/no] ").strip().lower()
-                if yes_or_no == "yes":
-                    if secret_key_value is None:
-                        secret_value_json[secret_key_name] = "DEACTIVATED:" + secret_value_json[secret_key_name]
-                    else:
-                        secret_value_json[secret_key_name] = secret_key_value
-                    secrets_manager.update_secret(SecretId=secret_name, SecretString=json.dumps(secret_value_json))
-                    return True
-            except Exception as e:
-                PRINT(f"EXCEPTION: {str(e)}")
-            return False
+                    print_secret_value("New", secret_key_name, secret_key_value, plaintext)
+                secret_keys_to_update[secret_key_name] = (action, secret_key_value)
+            if not secret_keys_to_update:
+                return False
+            PRINT(f"Changes to AWS secret {secret_name}:")
+            for secret_key_name, (action, _) in secret_keys_to_update.items():
+                PRINT(f"- {action}: {secret_key_name}")
+            yes_or_no = input(f"Are you sure you want to make these changes to AWS secret {secret_name}? [yes/no] ").strip().lower()
+            if yes_or_no == "yes":
+                for secret_key_name, (_, secret_key_value) in secret_keys_to_update.items():
+                    secret_value_json[secret_key_name] = secret_key_value
+                secrets_manager.update_secret(SecretId=secret_name, SecretString=json.dumps(secret_value_json))
+                return True
+        except Exception as e:
+            PRINT(f"EXCEPTION: {str(e)}")
+        return False
 
     def find_iam_user_name(self, user_name_pattern: str) -> str:
         """
@@ -107,14 +133,13 @@ class AwsFunctions(AwsContext):
         :param user_name_pattern: Regular expression for user name.
         :return: Matched user name or None if none found.
         """
-        with super().establish_credentials():
-            iam = boto3.resource('iam')
-            users = iam.users.all()
-            for user in sorted(users, key=lambda user: user.name):
-                user_name = user.name
-                if re.search(user_name_pattern, user_name):
-                    return user_name
-        return None
+        self._require_credentials()
+        iam = self._client('iam')
+        # Single pass (no sort) for the (alphabetically) first matching user name.
+        user_name_regex = re.compile(user_name_pattern)
+        return min((user["UserName"]
+                    for page in iam.get_paginator("list_users").paginate()
+                    for user in page["Users"] if user_name_regex.search(user["UserName"])), default=None)
 
     def get_customer_managed_kms_keys(self):
         """
@@ -123,9 +148,10 @@ class AwsFunctions(AwsContext):
         :return: List of customer managed KMS key IDs; empty list of none found.
         """
         kms_keys = []
-        with super().establish_credentials():
-            kms = boto3.client("kms")
-            for key in kms.list_keys()["Keys"]:
+        self._require_credentials()
+        kms = self._client("kms")
+        for page in kms.get_paginator("list_keys").paginate():
+            for key in page["Keys"]:
                 key_id = key["KeyId"]
                 key_description = kms.describe_key(KeyId=key_id)
                 key_metadata = key_description["KeyMetadata"]
@@ -134,6 +160,26 @@ class AwsFunctions(AwsContext):
                     kms_keys.append(key_id)
         return kms_keys
 
+    def get_s3_encrypt_kms_key_id(self, alias_prefix: str = "alias/s3") -> str:
+        """
+        Returns the AWS KMS key ID targeted by the first KMS key alias whose name starts
+        with the given alias prefix, ignoring AWS managed aliases (i.e. alias/aws/...).
+        This is a targeted alternative to listing/describing all of the KMS keys.
+
+        :param alias_prefix: KMS key alias name prefix to look for.
+        :return: KMS key ID for the first matching alias or None if none found.
+        """
+        self._require_credentials()
+        kms = self._client("kms")
+        for page in kms.get_paginator("list_aliases").paginate():
+            for alias in page["Aliases"]:
+                alias_name = alias["AliasName"]
+                if alias_name.startswith("alias/aws/"):
+                    continue
+                if alias_name.startswith(alias_prefix) and alias.get("TargetKeyId"):
+                    return alias["TargetKeyId"]
+        return None
+
     def get_opensearch_endpoint(self, aws_credentials_name: str):
         """
         Returns the endpoint (host:port) for the ElasticSearch instance associated
@@ -142,27 +188,26 @@ class AwsFunctions(AwsContext):
         :param aws_credentials_name: AWS credentials name (e.g. cgap-supertest).
         :return: Endpoint (host:port) for ElasticSearch or None if not found.
         """
-        with super().establish_credentials():
-            # TODO: Get this name from somewhere in 4dn-cloud-infra.
-            opensearch_instance_name = f"es-{aws_credentials_name}"
-            opensearch = boto3.client('opensearch')
-            domain_names = opensearch.list_domain_names()["DomainNames"]
-            domain_name = [domain_name for domain_name in domain_names if domain_name["DomainName"] == opensearch_instance_name]
-            if domain_name is None or len(domain_name) != 1:
-                return None
-            domain_name = domain_name[0]["DomainName"]
-            domain_description = opensearch.describe_domain(DomainName=domain_name)
-            domain_status = domain_description["DomainStatus"]
-            domain_endpoints = domain_status["Endpoints"]
-            domain_endpoint_options = domain_status["DomainEndpointOptions"]
-            domain_endpoint_vpc = domain_endpoints["vpc"]
-            # TODO: This EnforceHTTPS is from datastore.py/elasticsearch_instance.
-            domain_endpoint_https = domain_endpoint_options["EnforceHTTPS"]
-            if domain_endpoint_https:
-                domain_endpoint = f"{domain_endpoint_vpc}:443"
-            else:
-                domain_endpoint = f"{domain_endpoint_vpc}:80"
-            return domain_endpoint
+        self._require_credentials()
+        # TODO: Get this name from somewhere in 4dn-cloud-infra.
+        opensearch_instance_name = f"es-{aws_credentials_name}"
+        opensearch = self._client('opensearch')
+        # N.B. There is no boto3 paginator for list_domain_names; it returns all domains in one response.
+        domain_names = {domain_name["DomainName"] for domain_name in opensearch.list_domain_names()["DomainNames"]}
+        if opensearch_instance_name not in domain_names:
+            return None
+        domain_description = opensearch.describe_domain(DomainName=opensearch_instance_name)
+        domain_status = domain_description["DomainStatus"]
+        domain_endpoints = domain_status["Endpoints"]
+        domain_endpoint_options = domain_status["DomainEndpointOptions"]
+        domain_endpoint_vpc = domain_endpoints["vpc"]
+        # TODO: This EnforceHTTPS is from datastore.py/elasticsearch_instance.
+        domain_endpoint_https = domain_endpoint_options["EnforceHTTPS"]
+        if domain_endpoint_https:
+            domain_endpoint = f"{domain_endpoint_vpc}:443"
+        else:
+            domain_endpoint = f"{domain_endpoint_vpc}:80"
+        return domain_endpoint
 
     def create_user_access_key(self, user_name: str, show: bool = False) -> [str,str]:
         """
@@ -173,36 +218,33 @@ class AwsFunctions(AwsContext):
         :param user_name: AWS IAM user name.
         :return: Tuple containing the access key ID and associated secret.
         """
-        with super().establish_credentials():
-            iam = boto3.resource('iam')
-            user = [user for user in iam.users.all() if user.name == user_name]
-            if not user or len(user) <= 0:
-                PRINT("AWS user not found for security access key pair creation: {user_name}")
-                return None, None
-            if len(user) > 1:
-                PRINT("Multiple AWS users found for security access key pair creation: {user_name}")
-                return None, None
-            user = user[0]
-            existing_keys = boto3.client('iam').list_access_keys(UserName=user.name)
-            if existing_keys:
-                existing_keys = existing_keys.get("AccessKeyMetadata")
-                if existing_keys and len(existing_keys) > 0:
-                    if len(existing_keys) ==  1:
-                        PRINT(f"AWS IAM user ({user.name}) already has an access key defined:")
-                    else:
-                        PRINT(f"AWS IAM user ({user.name}) already has {len(existing_keys)} access keys defined:")
-                    for existing_key in existing_keys:
-                        existing_access_key_id = existing_key["AccessKeyId"]
-                        existing_access_key_create_date = existing_key["CreateDate"]
-                        PRINT(f"- {existing_access_key_id} (created: {existing_access_key_create_date.astimezone().strftime('%Y-%m-%d %H:%M:%S')})")
-                    yes_or_no = input("Do you still want to create a new access key? [yes/no] ").strip().lower()
-                    if yes_or_no != "yes":
-                        return None, None
-            PRINT(f"Creating AWS security access key pair for AWS IAM user: {user.name}")
-            yes_or_no = input(f"Continue? [yes/no] ").strip().lower()
-            if yes_or_no == "yes":
-                key_pair = user.create_access_key_pair()
-                PRINT(f"- Created AWS Access Key ID ({user.name}): {key_pair.id}")
-                PRINT(f"- Created AWS Secret Access Key ({user.name}): {obfuscate(key_pair.secret)}")
-                return key_pair.id, key_pair.secret
+        self._require_credentials()
+        iam = self._client('iam')
+        try:
+            user_name = iam.get_user(UserName=user_name)["User"]["UserName"]
+        except iam.exceptions.NoSuchEntityException:
+            PRINT(f"AWS user not found for security access key pair creation: {user_name}")
             return None, None
+        existing_keys = [existing_key
+                         for page in iam.get_paginator("list_access_keys").paginate(UserName=user_name)
+                         for existing_key in page["AccessKeyMetadata"]]
+        if existing_keys:
+            if len(existing_keys) ==  1:
+                PRINT(f"AWS IAM user ({user_name}) already has an access key defined:")
+            else:
+                PRINT(f"AWS IAM user ({user_name}) already has {len(existing_keys)} access keys defined:")
+            for existing_key in existing_keys:
+                existing_access_key_id = existing_key["AccessKeyId"]
+                existing_access_key_create_date = existing_key["CreateDate"]
+                PRINT(f"- {existing_access_key_id} (created: {existing_access_key_create_date.astimezone().strftime('%Y-%m-%d %H:%M:%S')})")
+            yes_or_no = input("Do you still want to create a new access key? [yes/no] ").strip().lower()
+            if yes_or_no != "yes":
+                return None, None
+        PRINT(f"Creating AWS security access key pair for AWS IAM user: {user_name}")
+        yes_or_no = input(f"Continue? [yes/no] ").strip().lower()
+        if yes_or_no == "yes":
+            access_key = iam.create_access_key(UserName=user_name)["AccessKey"]
+            PRINT(f"- Created AWS Access Key ID ({user_name}): {access_key['AccessKeyId']}")
+            PRINT(f"- Created AWS Secret Access Key ({user_name}): {obfuscate(access_key['SecretAccessKey'])}")
+            return access_key["AccessKeyId"], access_key["SecretAccessKey"]
+        return None, None
@@ -68,7 +68,7 @@
 #   Get (if not already set) from custom/aws_creds/s3_encrypt_key.txt
 
 import argparse
-import boto3
+import concurrent.futures
 import contextlib
 import io
 import json
@@ -80,7 +80,6 @@ import re
 from dcicutils.misc_utils import PRINT
 from ...names import Names
 from ..init_custom_dir.defs import (InfraDirectories, InfraFiles)
-from .aws_functions import AwsFunctions
 from .utils import (obfuscate, should_obfuscate)
 
 
@@ -171,6 +170,8 @@ def main():
     aws_credentials_name = get_aws_credentials_name(custom_dir)
 
     # Get AWS credentials context object.
+    # N.B. Imported here (lazily) so that --help and early exits do not pay for importing boto3.
+    from .aws_functions import AwsFunctions
     aws = AwsFunctions(custom_aws_creds_dir, args.access_key, args.secret_key, args.region)
 
     # Get the relevant AWS secret names.
@@ -201,6 +202,7 @@ def main():
 
     # Verify the AWS credentials context and get the associated ACCOUNT_NUMBER value.
     # If ACCOUNT_NUMBER does not agree with what's in the config file (above) then warning (error?).
+    # All of the AWS calls below are made from within this (single) credentials context.
     with aws.establish_credentials() as credentials:
         PRINT(f"Your AWS access key: {credentials.access_key_id}")
         PRINT(f"Your AWS access secret: {credentials.secret_access_key if args.show else obfuscate(credentials.secret_access_key)}")
@@ -212,84 +214,103 @@ def main():
             PRINT(f"WARNING: Account number from your config file ({account_number}) does not match AWS ({credentials.account_number}).")
         secrets_to_update["ACCOUNT_NUMBER"] = credentials.account_number
 
-    PRINT(f"AWS global application configuration secret name: {global_application_secret_name}")
-    PRINT(f"AWS RDS application configuration secret name: {rds_secret_name}")
-
-    # Get the IAM "federated" user name.
-    if args.federated_user:
-        federated_user_name = args.federated_user
-    else:
-        # TODO: get string from code.
-        federated_user_name_pattern = "ApplicationS3Federator"
-        federated_user_name = aws.find_iam_user_name(federated_user_name_pattern)
-    if not federated_user_name:
-        # TODO: Should this be a hard error?
-        PRINT(f"ERROR: AWS federated user cannot be determined!")
-    else:
-        PRINT(f"AWS application federated IAM user: {federated_user_name}")
-
-    # Get the ElasticSearch host/port.
-    es_server = aws.get_opensearch_endpoint(aws_credentials_name)
-    PRINT(f"AWS application ElasticSearch server: {es_server}")
-    secrets_to_update["ENCODED_ES_SERVER"] = es_server
-
-    # Get the RDS hostname and password.
-    if not rds_secret_name:
-        # TODO: Should this be a hard error?
-        PRINT(f"ERROR: Cannot determine RDS secret name!")
-    else:
-        rds_hostname = aws.get_secret_value(rds_secret_name, "host")
-        PRINT(f"AWS application RDS host name: {rds_hostname}")
-        rds_password = aws.get_secret_value(rds_secret_name, "password")
-        PRINT(f"AWS application RDS host password: {rds_password if args.show else obfuscate(rds_password)}")
-        secrets_to_update["RDS_HOST"] = rds_hostname
-        secrets_to_update["RDS_PASSWORD"] = rds_password
-
-    # Get the ENCODED_S3_ENCRYPT_KEY_ID from KMS.
-    # Only needed if s3.bucket.encryption is True in the local custom config file.
-    s3_bucket_encryption = get_s3_bucket_encryption_from_config_file(custom_dir)
-    PRINT(f"AWS application S3 bucket encryption enabled: {'Yes' if s3_bucket_encryption else 'No'}")
-    if not s3_bucket_encryption:
-        customer_managed_kms_keys = aws.get_customer_managed_kms_keys()
-        if not customer_managed_kms_keys or len(customer_managed_kms_keys) == 0:
-            PRINT("Cannot find a customer managed KMS key in AWS.")
-        elif customer_managed_kms_keys and len(customer_managed_kms_keys) > 1:
-            # TODO: What to do here if more than one exists?
-            # warn function
-            PRINT("WARNING: More than one customer managed KMS key found in AWS.")
-            for customer_managed_kms_key in sorted(customer_managed_kms_keys, key=lambda key: key):
-                PRINT(f"- {customer_managed_kms_key}")
+        # Get the ENCODED_S3_ENCRYPT_KEY_ID from KMS (below).
+        # Only needed if s3.bucket.encryption is True in the local custom config file.
+        s3_bucket_encryption = get_s3_bucket_encryption_from_config_file(custom_dir)
+
+        # The AWS lookups below are read-only and independent of each other, so fan them out
+        # concurrently (wall time is then that of the slowest rather than the sum of them all).
+        # This is done within the above credentials context, which all AwsFunctions calls
+        # here use (and which must be established for them), along with its boto3 clients.
+        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
+            # TODO: get federated user name pattern string from code.
+            federated_user_name_future = (executor.submit(aws.find_iam_user_name, "ApplicationS3Federator")
+                                          if not args.federated_user else None)
+            es_server_future = executor.submit(aws.get_opensearch_endpoint, aws_credentials_name)
+            if rds_secret_name:
+                rds_hostname_future = executor.submit(aws.get_secret_value, rds_secret_name, "host")
+                rds_password_future = executor.submit(aws.get_secret_value, rds_secret_name, "password")
+            s3_encrypt_key_id_future = (executor.submit(aws.get_s3_encrypt_kms_key_id)
+                                        if not s3_bucket_encryption else None)
+        federated_user_name = (federated_user_name_future.result()
+                               if federated_user_name_future else args.federated_user)
+        es_server = es_server_future.result()
+        if rds_secret_name:
+            rds_hostname = rds_hostname_future.result()
+            rds_password = rds_password_future.result()
+        s3_encrypt_key_id = s3_encrypt_key_id_future.result() if s3_encrypt_key_id_future else None
+        # Only if there is no S3 encryption KMS key alias do we fall back to looking through all KMS keys.
+        customer_managed_kms_keys = (aws.get_customer_managed_kms_keys()
+                                     if not s3_bucket_encryption and not s3_encrypt_key_id else None)
+
+        PRINT(f"AWS global application configuration secret name: {global_application_secret_name}")
+        PRINT(f"AWS RDS application configuration secret name: {rds_secret_name}")
+
+        # Get the IAM "federated" user name.
+        if not federated_user_name:
+            # TODO: Should this be a hard error?
+            PRINT(f"ERROR: AWS federated user cannot be determined!")
         else:
-            s3_encrypt_key_id = customer_managed_kms_keys[0]
-            PRINT(f"AWS application customer managed KMS (S3 encrypt) key ID: {s3_encrypt_key_id}")
-            secrets_to_update["ENCODED_S3_ENCRYPT_KEY_ID"] = s3_encrypt_key_id
+            PRINT(f"AWS application federated IAM user: {federated_user_name}")
 
-    # Create the security access key/secret pair for the IAM "federated" user.
-    if federated_user_name:
-        key_id, key_secret = aws.create_user_access_key(federated_user_name, args.show)
-        secrets_to_update["S3_AWS_ACCESS_KEY_ID"] = key_id
-        secrets_to_update["S3_AWS_SECRET_ACCESS_KEY"] = key_secret
-
-    # Summarize the secrets which will be set in the global application configuration.
-    PRINT()
-    PRINT(f"Secret keys/values to be set in AWS secrets manager for secret: {global_application_secret_name}")
-    for secret_key, secret_value in sorted(secrets_to_update.items(), key=lambda item: item[0]):
-        if secret_value is None:
-            display_secret_value = "<no-value: will marked as deactivated>"
-        elif should_obfuscate(secret_key) and not args.show:
-            display_secret_value = obfuscate(secret_value)
-        else:
-            display_secret_value = secret_value
-        PRINT(f"- {secret_key}: {display_secret_value}")
+        # Get the ElasticSearch host/port.
+        PRINT(f"AWS application ElasticSearch server: {es_server}")
+        secrets_to_update["ENCODED_ES_SERVER"] = es_server
 
-    # Confirm that the user wants to got ahead and set these values, and if so, set them.
-    yes_or_no = input("Do you want to go ahead and set these secrets in AWS? [yes/no] ").strip().lower()
-    if yes_or_no == "yes":
-        for secret_key_name, secret_key_value in secrets_to_update.items():
+        # Get the RDS hostname and password.
+        if not rds_secret_name:
+            # TODO: Should this be a hard error?
+            PRINT(f"ERROR: Cannot determine RDS secret name!")
+        else:
+            PRINT(f"AWS application RDS host name: {rds_hostname}")
+            PRINT(f"AWS application RDS host password: {rds_password if args.show else obfuscate(rds_password)}")
+            secrets_to_update["RDS_HOST"] = rds_hostname
+            secrets_to_update["RDS_PASSWORD"] = rds_password
+
+        # Get the ENCODED_S3_ENCRYPT_KEY_ID from KMS.
+        PRINT(f"AWS application S3 bucket encryption enabled: {'Yes' if s3_bucket_encryption else 'No'}")
+        if s3_encrypt_key_id:
+            PRINT(f"AWS application customer managed KMS (S3 encrypt) key ID: {s3_encrypt_key_id}")
+            secrets_to_update["ENCODED_S3_ENCRYPT_KEY_ID"] = s3_encrypt_key_id
+        elif not s3_bucket_encryption:
+            if not customer_managed_kms_keys or len(customer_managed_kms_keys) == 0:
+                PRINT("Cannot find a customer managed KMS key in AWS.")
+            elif customer_managed_kms_keys and len(customer_managed_kms_keys) > 1:
+                # TODO: What to do here if more than one exists?
+                # warn function
+                PRINT("WARNING: More than one customer managed KMS key found in AWS.")
+                for customer_managed_kms_key in sorted(customer_managed_kms_keys, key=lambda key: key):
+                    PRINT(f"- {customer_managed_kms_key}")
+            else:
+                s3_encrypt_key_id = customer_managed_kms_keys[0]
+                PRINT(f"AWS application customer managed KMS (S3 encrypt) key ID: {s3_encrypt_key_id}")
+                secrets_to_update["ENCODED_S3_ENCRYPT_KEY_ID"] = s3_encrypt_key_id
+
+        # Create the security access key/secret pair for the IAM "federated" user.
+        if federated_user_name:
+            key_id, key_secret = aws.create_user_access_key(federated_user_name, args.show)
+            secrets_to_update["S3_AWS_ACCESS_KEY_ID"] = key_id
+            secrets_to_update["S3_AWS_SECRET_ACCESS_KEY"] = key_secret
+
+        # Summarize the secrets which will be set in the global application configuration.
+        PRINT()
+        PRINT(f"Secret keys/values to be set in AWS secrets manager for secret: {global_application_secret_name}")
+        for secret_key, secret_value in sorted(secrets_to_update.items(), key=lambda item: item[0]):
+            if secret_value is None:
+                display_secret_value = "<no-value: will marked as deactivated>"
+            elif should_obfuscate(secret_key) and not args.show:
+                display_secret_value = obfuscate(secret_value)
+            else:
+                display_secret_value = secret_value
+            PRINT(f"- {secret_key}: {display_secret_value}")
+
+        # Confirm that the user wants to got ahead and set these values, and if so, set them.
+        yes_or_no = input("Do you want to go ahead and set these secrets in AWS? [yes/no] ").strip().lower()
+        if yes_or_no == "yes":
             PRINT("")
-            aws.update_secret_key_value(global_application_secret_name, secret_key_name, secret_key_value, args.show)
-    else:
-        PRINT("Exiting without doing anything.")
+            aws.update_secret_keys(global_application_secret_name, secrets_to_update, args.show)
+        else:
+            PRINT("Exiting without doing anything.")
 
 
 if __name__ == "__main__":
@@ -1,6 +1,19 @@
 import re
 
 
+SECRET_KEY_NAMES_FOR_OBFUSCATION = [
+    ".*secret.*",
+    ".*secrt.*",
+    ".*password.*",
+    ".*passwd.*",
+    ".*crypt.*"
+]
+
+# Compiled just once, here at module load, rather than on every should_obfuscate call.
+_SECRET_KEY_NAMES_FOR_OBFUSCATION_REGEXES = [re.compile(regex, re.IGNORECASE)
+                                             for regex in SECRET_KEY_NAMES_FOR_OBFUSCATION]
+
+
 def should_obfuscate(key: str) -> bool:
     """
     Returns True if the given key looks like it represents a secret value.
@@ -9,15 +22,7 @@ def should_obfuscate(key: str) -> bool:
     in the SECRET_KEY_NAMES_FOR_OBFUSCATION list, which can be a regular
     expression. Add more to SECRET_KEY_NAMES_FOR_OBFUSCATION if/when needed.
     """
-    SECRET_KEY_NAMES_FOR_OBFUSCATION = [
-        ".*secret.*",
-        ".*secrt.*",
-        ".*password.*",
-        ".*passwd.*",
-        ".*crypt.*"
-    ]
-    secret_key_names_regex = map(lambda regex: re.compile(regex, re.IGNORECASE), SECRET_KEY_NAMES_FOR_OBFUSCATION)
-    return any(regex.match(key) for regex in secret_key_names_regex)
+    return any(regex.match(key) for regex in _SECRET_KEY_NAMES_FOR_OBFUSCATION_REGEXES)
 
 
 def obfuscate(value: str) -> str:
@@ -1,2 +0,0 @@
-# TODO: Probably should factor out utils from init_custom_dir into common "auto" utils.
-from ..init_custom_dir.defs import (InfraDirectories, InfraFiles)
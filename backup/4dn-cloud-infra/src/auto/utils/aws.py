@@ -1,8 +1,10 @@
-import boto3
 import botocore
+import concurrent.futures
+import functools
+import hashlib
 import json
 import re
-from typing import Optional
+from typing import Iterable, Iterator, Optional, Tuple, Union
 from dcicutils.cloudformation_utils import C4OrchestrationManager
 from dcicutils.command_utils import yes_or_no
 from dcicutils.misc_utils import ignored, PRINT
@@ -13,6 +15,48 @@ from .misc_utils import (obfuscate, print_exception, should_obfuscate)
 class Aws(AwsContext):
 
     _DEACTIVATED_SECRET_VALUE_PREFIX = "DEACTIVATED:"
+    # Maximum number of concurrent KMS describe_key calls (the default boto3 client connection pool size).
+    _KMS_DESCRIBE_KEY_MAX_WORKERS = 10
+
+    # Security group rule types by (protocol, from port, to port); see get_security_group_rule_display_value.
+    _SECURITY_GROUP_RULE_TYPES = {
+        ("tcp", 22, 22): "SSH",
+        ("tcp", 80, 80): "HTTP",
+        ("tcp", 443, 443): "HTTPS"
+    }
+    # Security group rule ICMP (protocol, port range) display values by ICMP type (from port).
+    _SECURITY_GROUP_RULE_ICMP_TYPES = {
+        3: ("Destination Unreachable", "All"),
+        4: ("Source Quench", "N/A"),
+        8: ("Echo Request", "N/A"),
+        11: ("Time Exceeded", "All")
+    }
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        # Cache of (found) AWS security group IDs by security group name; see find_security_group_ids.
+        self._security_group_ids = {}
+        # Fingerprints (hashes) of the secret key values written (by this object) by secret name and
+        # secret key name; used to skip re-fetching a secret to "update" it to a value just written.
+        # Only valid within a single establish_credentials context; see _clear_credentials_caches.
+        self._secret_key_value_fingerprints = {}
+        # Cache of the (parsed) JSON of the secrets read or written (by this object) by secret name;
+        # used so that subsequent reads/updates of the same secret need not re-fetch it. Only valid
+        # within a single establish_credentials context; see _clear_credentials_caches.
+        self._secret_values_json = {}
+        # Cache of all of the AWS stack output values by output key name; see get_all_stack_outputs.
+        self._stack_output_values = None
+
+    def _clear_credentials_caches(self) -> None:
+        super()._clear_credentials_caches()
+        # N.B. Secrets may be changed by others at any time; so do not hold on to
+        # any cached secret values beyond a single establish_credentials context.
+        self._secret_values_json.clear()
+        self._secret_key_value_fingerprints.clear()
+
+    @staticmethod
+    def _get_secret_key_value_fingerprint(secret_key_value: Optional[str]) -> Optional[str]:
+        return hashlib.sha256(secret_key_value.encode("utf-8")).hexdigest() if secret_key_value is not None else None
 
     def get_secret_value(self, secret_name: str, secret_key_name: str) -> str:
         """
@@ -24,11 +68,15 @@ class Aws(AwsContext):
         :return: Secret key value if found or None if not found.
         """
         with super().establish_credentials():
-            secrets_manager = boto3.client("secretsmanager")
-            secret_values = secrets_manager.get_secret_value(SecretId=secret_name)
-            secret_values_json = json.loads(secret_values["SecretString"])
-            secret_key_value = secret_values_json.get(secret_key_name)
-            return secret_key_value
+            # N.B. Secrets read here are cached only for the current establish_credentials context;
+            # so different keys within the same secret, read within one context, cost one AWS call.
+            secret_values_json = self._secret_values_json.get(secret_name)
+            if secret_values_json is None:
+                secrets_manager = self._client("secretsmanager")
+                secret_values = secrets_manager.get_secret_value(SecretId=secret_name)
+                secret_values_json = json.loads(secret_values["SecretString"])
+                self._secret_values_json[secret_name] = secret_values_json
+            return secret_values_json.get(secret_key_name)
 
     def update_secret_key_value(self,
                                 secret_name: str,
@@ -41,6 +89,7 @@ class Aws(AwsContext):
         If the given secret key value is None then the given secret key will be "deactivated",
         where this means that its old value will be prepended with the string "DEACTIVATED:".
         This is a command-line INTERACTIVE process, prompting the user for info/confirmation.
+        Thin wrapper around update_secret_key_values for a single secret key.
 
         :param secret_name: AWS secret name.
         :param secret_key_name: AWS secret key name to update.
@@ -48,6 +97,23 @@ class Aws(AwsContext):
         :param show: True to show any displayed sensitive values in plaintext.
         :return: True if succeeded otherwise false.
         """
+        return self.update_secret_key_values(secret_name, {secret_key_name: secret_key_value}, show)
+
+    def update_secret_key_values(self, secret_name: str, secret_keys: dict, show: bool = False) -> bool:
+        """
+        Updates the AWS secret values for all of the given secret key names/values within the given
+        secret name; the secret is read once, all changes are applied to it in memory, the user is
+        asked to confirm the whole set of changes, and the secret is then written back once.
+        If a given secret key value does not yet exist it will be created.
+        If a given secret key value is None then that secret key will be "deactivated",
+        where this means that its old value will be prepended with the string "DEACTIVATED:".
+        This is a command-line INTERACTIVE process, prompting the user for info/confirmation.
+
+        :param secret_name: AWS secret name.
+        :param secret_keys: Dictionary of AWS secret key names/values to update; None values are deactivated.
+        :param show: True to show any displayed sensitive values in plaintext.
+        :return: True if succeeded otherwise false.
+        """
 
         def print_secret(prefix: str, name: str, key_name: str, key_value: str) -> None:
             if not key_value:
@@ -64,53 +130,89 @@ class Aws(AwsContext):
                 PRINT(f"{prefix} value of AWS secret {name}.{key_name}{suffix}: {key_value}")
 
         PRINT()
+        # Skip (without fetching the secret) any secret key values which were just written by this object.
+        secret_key_value_fingerprints = self._secret_key_value_fingerprints.get(secret_name, {})
+        secret_keys = dict(secret_keys)
+        for secret_key_name, secret_key_value in list(secret_keys.items()):
+            if (secret_key_value is not None and secret_key_value_fingerprints.get(secret_key_name) ==
+                    self._get_secret_key_value_fingerprint(secret_key_value)):
+                PRINT(f"New value of AWS secret ({secret_name}.{secret_key_name}) same as the one just written."
+                      f" Nothing to update.")
+                del secret_keys[secret_key_name]
+        if not secret_keys:
+            return False
         with super().establish_credentials():
-            secrets_manager = boto3.client("secretsmanager")
+            secrets_manager = self._client("secretsmanager")
             try:
-                # To update an individual secret key value we need to get the entire JSON
-                # associated with the given secret name, update the specific element for
-                # the given secret key name with the new given value, and write the updated
-                # JSON back as the secret value for the given secret name.
-                try:
-                    secret_value = secrets_manager.get_secret_value(SecretId=secret_name)
-                except Exception:
-                    PRINT(f"AWS secret name does not exist: {secret_name}")
-                    return False
-                secret_value_json = json.loads(secret_value["SecretString"])
-                secret_key_value_current = secret_value_json.get(secret_key_name)
-                if secret_key_value is None:
-                    # Deactivating secret key value.
-                    if secret_key_value_current is None:
-                        PRINT(f"AWS secret {secret_name}.{secret_key_name} does not exist."
-                              f" Nothing to deactivate.")
-                        return False
-                    print_secret("Current", secret_name, secret_key_name, secret_key_value_current)
-                    if secret_key_value_current.startswith(self._DEACTIVATED_SECRET_VALUE_PREFIX):
-                        PRINT(f"AWS secret {secret_name}.{secret_key_name} is already deactivated."
-                              f" Nothing to do.")
+                # To update individual secret key values we need to get the entire JSON
+                # associated with the given secret name, update the specific elements for
+                # the given secret key names with the new given values, and write the updated
+                # JSON back (once) as the secret value for the given secret name.
+                secret_value_json = self._secret_values_json.get(secret_name)
+                if secret_value_json is None:
+                    try:
+                        secret_value = secrets_manager.get_secret_value(SecretId=secret_name)
+                    except Exception:
+                        PRINT(f"AWS secret name does not exist: {secret_name}")
                         return False
-                    secret_key_value = self._DEACTIVATED_SECRET_VALUE_PREFIX + secret_key_value_current
-                    action = "deactivate"
+                    secret_value_json = json.loads(secret_value["SecretString"])
                 else:
-                    if secret_key_value_current is None:
-                        # Creating new secret key value.
-                        PRINT(f"AWS secret {secret_name}.{secret_key_name} does not yet exist.")
-                        action = "create"
-                    else:
-                        # Updating existing secret key value.
+                    # Work on a copy so the cached secret is unchanged unless the update succeeds.
+                    secret_value_json = dict(secret_value_json)
+                secret_keys_to_update = {}
+                for secret_key_name, secret_key_value in secret_keys.items():
+                    secret_key_value_current = secret_value_json.get(secret_key_name)
+                    if secret_key_value is None:
+                        # Deactivating secret key value.
+                        if secret_key_value_current is None:
+                            PRINT(f"AWS secret {secret_name}.{secret_key_name} does not exist."
+                                  f" Nothing to deactivate.")
+                            continue
                         print_secret("Current", secret_name, secret_key_name, secret_key_value_current)
-                        action = "update"
-                        if secret_key_value_current == secret_key_value:
-                            PRINT(f"New value of AWS secret ({secret_name}.{secret_key_name}) same as current one."
-                                  f" Nothing to update.")
-                            return False
-                    print_secret("New", secret_name, secret_key_name, secret_key_value)
-                yes = yes_or_no(f"Are you sure you want to {action} AWS secret {secret_name}.{secret_key_name}?")
+                        if secret_key_value_current.startswith(self._DEACTIVATED_SECRET_VALUE_PREFIX):
+                            PRINT(f"AWS secret {secret_name}.{secret_key_name} is already deactivated."
+                                  f" Nothing to do.")
+                            continue
+                        secret_key_value = self._DEACTIVATED_SECRET_VALUE_PREFIX + secret_key_value_current
+                        action = "deactivate"
+                    else:
+                        if secret_key_value_current is None:
+                            # Creating new secret key value.
+                            PRINT(f"AWS secret {secret_name}.{secret_key_name} does not yet exist.")
+                            action = "create"
+                        else:
+                            # Updating existing secret key value.
+                            print_secret("Current", secret_name, secret_key_name, secret_key_value_current)
+                            action = "update"
+                            if secret_key_value_current == secret_key_value:
+                                PRINT(f"New value of AWS secret ({secret_name}.{secret_key_name})"
+                                      f" same as current one. Nothing to update.")
+                                continue
+                        print_secret("New", secret_name, secret_key_name, secret_key_value)
+                    secret_keys_to_update[secret_key_name] = (action, secret_key_value)
+                if not secret_keys_to_update:
+                    return False
+                if len(secret_keys_to_update) == 1:
+                    secret_key_name, (action, _) = next(iter(secret_keys_to_update.items()))
+                    yes = yes_or_no(f"Are you sure you want to {action} AWS secret {secret_name}.{secret_key_name}?")
+                else:
+                    PRINT(f"Changes to AWS secret {secret_name}:")
+                    for secret_key_name, (action, _) in secret_keys_to_update.items():
+                        PRINT(f"- {action}: {secret_name}.{secret_key_name}")
+                    yes = yes_or_no(f"Are you sure you want to make these changes to AWS secret {secret_name}?")
                 if yes:
-                    secret_value_json[secret_key_name] = secret_key_value
+                    for secret_key_name, (_, secret_key_value) in secret_keys_to_update.items():
+                        secret_value_json[secret_key_name] = secret_key_value
                     secrets_manager.update_secret(SecretId=secret_name, SecretString=json.dumps(secret_value_json))
+                    self._secret_values_json[secret_name] = secret_value_json
+                    secret_key_value_fingerprints = self._secret_key_value_fingerprints.setdefault(secret_name, {})
+                    for secret_key_name, (_, secret_key_value) in secret_keys_to_update.items():
+                        secret_key_value_fingerprints[secret_key_name] = (
+                            self._get_secret_key_value_fingerprint(secret_key_value))
                     return True
             except Exception as e:
+                self._secret_values_json.pop(secret_name, None)
+                self._secret_key_value_fingerprints.pop(secret_name, None)
                 print_exception(e)
             return False
 
@@ -123,12 +225,24 @@ class Aws(AwsContext):
         :return: Matched user name or None if none found.
         """
         with super().establish_credentials():
-            iam = boto3.resource("iam")
-            users = iam.users.all()
-            for user in users:
-                user_name = user.name
-                if re.match(user_name_pattern, user_name):
-                    return user_name
+            iam = self._client("iam")
+            user_name_regex = re.compile(user_name_pattern)
+            if re.fullmatch(r"[\w=,@-]+", user_name_pattern):
+                # Plain (literal) user name pattern, i.e. only IAM user name characters which are not regular
+                # expression special characters; so first try getting a user with this name directly,
+                # rather than listing all users. N.B. IAM user names are case-insensitive, so the user found
+                # may differ in case from the pattern, which is case-sensitive; so it must still match it.
+                try:
+                    user_name = iam.get_user(UserName=user_name_pattern)["User"]["UserName"]
+                    if user_name_regex.match(user_name):
+                        return user_name
+                except iam.exceptions.NoSuchEntityException:
+                    pass
+            for page in iam.get_paginator("list_users").paginate():
+                for user in page["Users"]:
+                    user_name = user["UserName"]
+                    if user_name_regex.match(user_name):
+                        return user_name
         return None
 
     def get_customer_managed_kms_keys(self) -> list:
@@ -137,18 +251,18 @@ class Aws(AwsContext):
 
         :return: List of customer managed KMS key IDs; empty list of none found.
         """
-        kms_keys = []
         with super().establish_credentials():
-            kms = boto3.client("kms")
-            for key in kms.list_keys()["Keys"]:
-                key_id = key["KeyId"]
-                key_description = kms.describe_key(KeyId=key_id)
-                key_metadata = key_description["KeyMetadata"]
-                key_manager = key_metadata["KeyManager"]
-                if key_manager == "CUSTOMER":
-                    # TODO: If multiple keys (for some reason) silently pick the most recently created one (?)
-                    # key_creation_date = key_metadata["CreationDate"]
-                    kms_keys.append(key_id)
+            kms = self._client("kms")
+            key_ids = [key["KeyId"] for page in kms.get_paginator("list_keys").paginate() for key in page["Keys"]]
+            # Describe the keys concurrently; boto3 clients are thread-safe, and this is
+            # limited to the (default) size of the client connection pool.
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self._KMS_DESCRIBE_KEY_MAX_WORKERS) as executor:
+                key_descriptions = list(executor.map(lambda key_id: kms.describe_key(KeyId=key_id), key_ids))
+            # TODO: If multiple keys (for some reason) silently pick the most recently created one (?)
+            # key_creation_date = key_metadata["CreationDate"]
+            kms_keys = [key_id
+                        for key_id, key_description in zip(key_ids, key_descriptions)
+                        if key_description["KeyMetadata"]["KeyManager"] == "CUSTOMER"]
         return kms_keys
 
     def get_elasticsearch_endpoint(self, aws_credentials_name: str) -> Optional[str]:
@@ -162,14 +276,11 @@ class Aws(AwsContext):
         with super().establish_credentials():
             # TODO: Get this name from somewhere in 4dn-cloud-infra.
             elasticsearch_instance_name = f"es-{aws_credentials_name}"
-            elasticsearch = boto3.client("opensearch")
-            domain_names = elasticsearch.list_domain_names()["DomainNames"]
-            domain_name = [domain_name for domain_name in domain_names
-                           if domain_name["DomainName"] == elasticsearch_instance_name]
-            if domain_name is None or len(domain_name) != 1:
+            elasticsearch = self._client("opensearch")
+            try:
+                domain_description = elasticsearch.describe_domain(DomainName=elasticsearch_instance_name)
+            except elasticsearch.exceptions.ResourceNotFoundException:
                 return None
-            domain_name = domain_name[0]["DomainName"]
-            domain_description = elasticsearch.describe_domain(DomainName=domain_name)
             domain_status = domain_description["DomainStatus"]
             domain_endpoints = domain_status["Endpoints"]
             domain_endpoint_options = domain_status["DomainEndpointOptions"]
@@ -193,56 +304,58 @@ class Aws(AwsContext):
         :return: Tuple containing the access key ID and associated secret.
         """
         with super().establish_credentials():
-            iam = boto3.resource("iam")
-            user = [user for user in iam.users.all() if user.name == user_name]
-            if not user or len(user) <= 0:
-                PRINT("AWS user not found for security access key pair creation: {user_name}")
-                return None, None
-            if len(user) > 1:
-                PRINT("Multiple AWS users found for security access key pair creation: {user_name}")
+            iam = self._client("iam")
+            try:
+                user_name = iam.get_user(UserName=user_name)["User"]["UserName"]
+            except iam.exceptions.NoSuchEntityException:
+                PRINT(f"AWS user not found for security access key pair creation: {user_name}")
                 return None, None
-            user = user[0]
-            existing_keys = boto3.client("iam").list_access_keys(UserName=user.name)
+            existing_keys = [existing_key
+                             for page in iam.get_paginator("list_access_keys").paginate(UserName=user_name)
+                             for existing_key in page["AccessKeyMetadata"]]
             if existing_keys:
-                existing_keys = existing_keys.get("AccessKeyMetadata")
-                if existing_keys and len(existing_keys) > 0:
-                    if len(existing_keys) == 1:
-                        PRINT(f"AWS IAM user ({user.name}) already has an access key defined:")
-                    else:
-                        PRINT(f"AWS IAM user ({user.name}) already has {len(existing_keys)} access keys defined:")
-                    for existing_key in existing_keys:
-                        existing_access_key_id = existing_key["AccessKeyId"]
-                        existing_access_key_create_date = existing_key["CreateDate"]
-                        PRINT(f"- {existing_access_key_id} (created:"
-                              f" {existing_access_key_create_date.astimezone().strftime('%Y-%m-%d %H:%M:%S')})")
-                    yes = yes_or_no("Do you still want to create a new access key?")
-                    if not yes:
-                        return None, None
-            yes = yes_or_no(f"Create AWS security access key pair for AWS IAM user: {user.name} ?")
+                if len(existing_keys) == 1:
+                    PRINT(f"AWS IAM user ({user_name}) already has an access key defined:")
+                else:
+                    PRINT(f"AWS IAM user ({user_name}) already has {len(existing_keys)} access keys defined:")
+                for existing_key in existing_keys:
+                    existing_access_key_id = existing_key["AccessKeyId"]
+                    existing_access_key_create_date = existing_key["CreateDate"]
+                    PRINT(f"- {existing_access_key_id} (created:"
+                          f" {existing_access_key_create_date.astimezone().strftime('%Y-%m-%d %H:%M:%S')})")
+                yes = yes_or_no("Do you still want to create a new access key?")
+                if not yes:
+                    return None, None
+            yes = yes_or_no(f"Create AWS security access key pair for AWS IAM user: {user_name} ?")
             if yes:
-                key_pair = user.create_access_key_pair()
-                PRINT(f"- Created AWS Access Key ID ({user.name}): {key_pair.id}")
-                PRINT(f"- Created AWS Secret Access Key ({user.name}): {obfuscate(key_pair.secret, show)}")
-                return key_pair.id, key_pair.secret
+                access_key = iam.create_access_key(UserName=user_name)["AccessKey"]
+                access_key_id = access_key["AccessKeyId"]
+                secret_access_key = access_key["SecretAccessKey"]
+                PRINT(f"- Created AWS Access Key ID ({user_name}): {access_key_id}")
+                PRINT(f"- Created AWS Secret Access Key ({user_name}): {obfuscate(secret_access_key, show)}")
+                return access_key_id, secret_access_key
             return None, None
 
-    def find_iam_role_arns(self, role_arn_pattern: str) -> list:
+    def find_iam_role_arns(self, role_arn_pattern: Union[str, re.Pattern]) -> frozenset:
         """
-        Returns the list of AWS IAM role ARNs which match the given role ARN pattern.
+        Returns the set of AWS IAM role ARNs which match the given role ARN pattern.
         Created for the update-kms-policy script.
 
-        :param role_arn_pattern: Regular expression to match role ARNs.
-        :return: List of matching AWS IAM role ARNs or empty list of none found.
+        :param role_arn_pattern: Regular expression (string or compiled) to match role ARNs.
+        :return: Set of matching AWS IAM role ARNs or empty set of none found.
         """
-        found_roles = []
+        found_roles = set()
+        # N.B. re.compile returns an already compiled pattern as-is.
+        role_arn_regex = re.compile(role_arn_pattern)
         with super().establish_credentials():
-            iam = boto3.client("iam")
-            roles = iam.list_roles()["Roles"]
-            for role in roles:
-                role_arn = role["Arn"]
-                if re.match(role_arn_pattern, role_arn):
-                    found_roles.append(role_arn)
-        return found_roles
+            iam = self._client("iam")
+            # Page through all of the roles (one list_roles call returns just the first page).
+            for page in iam.get_paginator("list_roles").paginate():
+                for role in page["Roles"]:
+                    role_arn = role["Arn"]
+                    if role_arn_regex.match(role_arn):
+                        found_roles.add(role_arn)
+        return frozenset(found_roles)
 
     def get_kms_key_policy(self, key_id: str) -> dict:
         """
@@ -253,29 +366,36 @@ class Aws(AwsContext):
         :return: Policy for given KMS key ID or None if not found.
         """
         with super().establish_credentials():
-            kms = boto3.client("kms")
+            kms = self._client("kms")
             key_policy = kms.get_key_policy(KeyId=key_id, PolicyName="default")["Policy"]
             key_policy_json = json.loads(key_policy)
             return key_policy_json
 
     @staticmethod
-    def get_kms_key_policy_principals(key_policy_json: dict, sid_pattern: str) -> list:
+    def get_kms_key_policy_principals(key_policy_json: dict, sid_pattern: Union[str, re.Pattern]) -> list:
         """
         Returns the AWS principals list for the specific KMS key policy within the
         given KMS key policy JSON, whose statement ID (sid) matches the given sid_pattern.
 
         :param key_policy_json: JSON for a KMS key policy.
-        :param sid_pattern: Statement ID (sid) pattern to match the specific policy.
+        :param sid_pattern: Statement ID (sid) pattern (string or compiled) to match the specific policy.
         :return: List of KMS key policy principals.
         """
+        sid_regex = re.compile(sid_pattern)
         key_policy_statements = key_policy_json["Statement"]
         for key_policy_statement in key_policy_statements:
             key_policy_statement_id = key_policy_statement["Sid"]
-            if re.match(sid_pattern, key_policy_statement_id):
-                return key_policy_statement["Principal"]["AWS"]
+            if sid_regex.match(key_policy_statement_id):
+                key_policy_statement_principals = key_policy_statement["Principal"]["AWS"]
+                # A single principal may be a plain string rather than a list; normalize it
+                # (in place) to a list so callers may use it as a collection and amend it.
+                if isinstance(key_policy_statement_principals, str):
+                    key_policy_statement_principals = [key_policy_statement_principals]
+                    key_policy_statement["Principal"]["AWS"] = key_policy_statement_principals
+                return key_policy_statement_principals
 
     @staticmethod
-    def amend_kms_key_policy(key_policy_json: dict, sid_pattern: str, additional_roles: list) -> int:
+    def amend_kms_key_policy(key_policy_json: dict, sid_pattern: Union[str, re.Pattern], additional_roles: list) -> int:
         """
         Amends the specific KMS key policy for the given key_policy_json (IN PLACE), whose statement
         ID (sid) matches the given sid_pattern, with the roles contained in the given additional_roles
@@ -283,15 +403,17 @@ class Aws(AwsContext):
         Created for the update-kms-policy script.
 
         :param key_policy_json: JSON for a KMS key policy.
-        :param sid_pattern: Statement ID (sid) pattern to match the specific policy.
+        :param sid_pattern: Statement ID (sid) pattern (string or compiled) to match the specific policy.
         :param additional_roles: List of AWS IAM role ARNs to add to the roles for the specified KMS policy.
         :return: Number of roles from the given addition roles actually added.
         """
         nadded = 0
         key_policy_statement_principals = Aws.get_kms_key_policy_principals(key_policy_json, sid_pattern)
+        existing_principals = set(key_policy_statement_principals)
         for additional_role in additional_roles:
-            if additional_role not in key_policy_statement_principals:
+            if additional_role not in existing_principals:
                 key_policy_statement_principals.append(additional_role)
+                existing_principals.add(additional_role)
                 nadded += 1
         key_policy_statement_principals.sort()
         return nadded
@@ -306,7 +428,7 @@ class Aws(AwsContext):
         :param key_policy_json: JSON for the KMS key policy.
         """
         with super().establish_credentials():
-            kms = boto3.client("kms")
+            kms = self._client("kms")
             key_policy_string = json.dumps(key_policy_json)
             kms.put_key_policy(KeyId=key_id, Policy=key_policy_string, PolicyName="default")
 
@@ -319,21 +441,53 @@ class Aws(AwsContext):
         :param outbound: True if outbound (egress) rules are desired, otherwise inbound (ingress).
         :return: List of inbound or outbound AWS security group rules for the given security group ID, or None.
         """
+        inbound_security_group_rules, outbound_security_group_rules = (
+            self.get_inbound_and_outbound_security_group_rules(security_group_id))
+        return outbound_security_group_rules if outbound else inbound_security_group_rules
+
+    def get_inbound_and_outbound_security_group_rules(
+            self,
+            security_group_id: str
+    ) -> Tuple[Optional[list], Optional[list]]:
+        """
+        Returns a tuple with the lists of inbound and outbound AWS security group rules for the given
+        AWS security group ID (each None if none found); gotten, and partitioned, in a single pass.
+        N.B. The AWS API has no filter for rule direction (IsEgress), so this is done here.
+
+        :param security_group_id: AWS security group ID.
+        :return: Tuple with lists of inbound and outbound AWS security group rules (or None) for the group.
+        """
+        inbound_security_group_rules = []
+        outbound_security_group_rules = []
+        for security_group_rule in self.iter_security_group_rules(security_group_id):
+            if security_group_rule.get("IsEgress"):
+                outbound_security_group_rules.append(security_group_rule)
+            else:
+                inbound_security_group_rules.append(security_group_rule)
+        return inbound_security_group_rules or None, outbound_security_group_rules or None
+
+    def iter_security_group_rules(self, security_group_id: str) -> Iterator[dict]:
+        """
+        Generator for the (inbound and outbound) AWS security group rules for the given AWS
+        security group ID; fetches each page of rules from AWS only as it is iterated, so
+        that early-exiting iteration (e.g. see find_security_group_rule) fetches no more.
+        N.B. The credentials context is held for the life of the iteration, and is exited
+        when the iteration completes or the generator is closed (e.g. on early exit).
+
+        :param security_group_id: AWS security group ID.
+        :return: Yields each AWS security group rule for the given security group ID.
+        """
         with super().establish_credentials():
-            ec2 = boto3.client('ec2')
+            ec2 = self._client("ec2")
             security_group_rules_filter = [{"Name": "group-id", "Values": [security_group_id]}]
             security_group_rules = ec2.describe_security_group_rules(Filters=security_group_rules_filter)
-            if not security_group_rules:
-                return None
-            security_group_rules = security_group_rules.get("SecurityGroupRules")
-            if not security_group_rules:
-                return None
-            security_group_rules = [security_group_rule
-                                    for security_group_rule in security_group_rules
-                                    if outbound == security_group_rule.get("IsEgress")]
-            if not security_group_rules:
-                return None
-            return security_group_rules
+            while security_group_rules:
+                yield from security_group_rules.get("SecurityGroupRules") or []
+                next_token = security_group_rules.get("NextToken")
+                if not next_token:
+                    break
+                security_group_rules = ec2.describe_security_group_rules(Filters=security_group_rules_filter,
+                                                                         NextToken=next_token)
 
     def get_inbound_security_group_rules(self, security_group_id: str) -> Optional[list]:
         """
@@ -362,17 +516,39 @@ class Aws(AwsContext):
         :param security_group_name: AWS security group name.
         :return: AWS security group ID for the given AWS security group name.
         """
+        return self.find_security_group_ids([security_group_name]).get(security_group_name)
+
+    def find_security_group_ids(self, security_group_names: list) -> dict:
+        """
+        Returns a dictionary of the AWS security group IDs for the given AWS security group names,
+        looked up with a single AWS call. Found IDs are cached (per Aws object) by security group name.
+        A name for which there is not exactly one security group maps to None.
+
+        :param security_group_names: List of AWS security group names.
+        :return: Dictionary of AWS security group IDs (or None) by AWS security group name.
+        """
+        security_group_ids = {security_group_name: self._security_group_ids.get(security_group_name)
+                              for security_group_name in security_group_names}
+        uncached_security_group_names = [security_group_name
+                                         for security_group_name, security_group_id in security_group_ids.items()
+                                         if not security_group_id]
+        if not uncached_security_group_names:
+            return security_group_ids
         with super().establish_credentials():
-            ec2 = boto3.client('ec2')
-            security_group_filter = [{"Name": "tag:Name", "Values": [security_group_name]}]
+            ec2 = self._client("ec2")
+            security_group_filter = [{"Name": "tag:Name", "Values": uncached_security_group_names}]
             security_groups = ec2.describe_security_groups(Filters=security_group_filter)
-            if not security_groups:
-                return None
-            security_groups = security_groups.get("SecurityGroups")
-            if not security_groups or len(security_groups) != 1:
-                return None
-            security_group_id = security_groups[0].get("GroupId")
-            return security_group_id
+            security_groups = security_groups.get("SecurityGroups") if security_groups else None
+            found_security_group_ids = {}
+            for security_group in security_groups or []:
+                for tag in security_group.get("Tags", []):
+                    if tag["Key"] == "Name" and tag["Value"] in security_group_ids:
+                        found_security_group_ids.setdefault(tag["Value"], []).append(security_group.get("GroupId"))
+            for security_group_name, found_ids in found_security_group_ids.items():
+                if len(found_ids) == 1:
+                    security_group_ids[security_group_name] = found_ids[0]
+                    self._security_group_ids[security_group_name] = found_ids[0]
+        return security_group_ids
 
     def create_inbound_security_group_rule(self, security_group_id: str, security_group_rule: dict) -> str:
         """
@@ -383,7 +559,7 @@ class Aws(AwsContext):
         :return: Security group rule ID of the newly created inbound rule.
         """
         with super().establish_credentials():
-            ec2 = boto3.client('ec2')
+            ec2 = self._client("ec2")
             response = ec2.authorize_security_group_ingress(GroupId=security_group_id,
                                                             IpPermissions=[security_group_rule])
             return response["SecurityGroupRules"][0]["SecurityGroupRuleId"]
@@ -397,7 +573,7 @@ class Aws(AwsContext):
         :return: Security group rule ID of the newly created outbound rule.
         """
         with super().establish_credentials():
-            ec2 = boto3.client('ec2')
+            ec2 = self._client("ec2")
             response = ec2.authorize_security_group_egress(GroupId=security_group_id,
                                                            IpPermissions=[security_group_rule])
             return response["SecurityGroupRules"][0]["SecurityGroupRuleId"]
@@ -410,7 +586,7 @@ class Aws(AwsContext):
         :param security_group_rule_id: AWS security group rule ID.
         """
         with super().establish_credentials():
-            ec2 = boto3.client('ec2')
+            ec2 = self._client("ec2")
             ec2.revoke_security_group_ingress(GroupId=security_group_id,
                                               SecurityGroupRuleIds=[security_group_rule_id])
 
@@ -422,13 +598,13 @@ class Aws(AwsContext):
         :param security_group_rule_id: AWS security group rule ID.
         """
         with super().establish_credentials():
-            ec2 = boto3.client('ec2')
+            ec2 = self._client("ec2")
             ec2.revoke_security_group_egress(GroupId=security_group_id,
                                              SecurityGroupRuleIds=[security_group_rule_id])
 
     @staticmethod
     def find_security_group_rule(
-            existing_security_group_rules: list,
+            existing_security_group_rules: Union[Iterable, dict],
             security_group_rule: dict,
             outbound: bool
     ) -> Optional[dict]:
@@ -439,24 +615,55 @@ class Aws(AwsContext):
         ec2 authorize_security_group_ingress or authorize_security_group_eggress functions.
         N.B. Ignores the description portion of the rule in comparison.
 
-        :param existing_security_group_rules: List of AWS security group rules.
+        :param existing_security_group_rules: List/iterator (or index_security_group_rules index) of rules.
         :param security_group_rule: AWS security group rule.
         :param outbound: True if finding and outbound (egress) rule, otherwise and inbound (ingress) rule.
         :return: AWS security group rule from the given existing rules that matches the given rule, or None.
         """
+        security_group_rule_ip_ranges = security_group_rule.get("IpRanges")
+        if not isinstance(security_group_rule_ip_ranges, list) or len(security_group_rule_ip_ranges) != 1:
+            return None
+        security_group_rule_key = (security_group_rule.get("IpProtocol"),
+                                   security_group_rule.get("FromPort"),
+                                   security_group_rule.get("ToPort"),
+                                   outbound,
+                                   security_group_rule_ip_ranges[0].get("CidrIp"))
+        if isinstance(existing_security_group_rules, dict):
+            return existing_security_group_rules.get(security_group_rule_key)
+        # Otherwise a list or iterator (e.g. iter_security_group_rules) so stop at the first match.
+        return next((existing_security_group_rule
+                     for existing_security_group_rule in existing_security_group_rules or []
+                     if Aws._get_security_group_rule_index_key(existing_security_group_rule)
+                     == security_group_rule_key), None)
+
+    @staticmethod
+    def _get_security_group_rule_index_key(existing_security_group_rule: dict) -> tuple:
+        return (existing_security_group_rule.get("IpProtocol"),
+                existing_security_group_rule.get("FromPort"),
+                existing_security_group_rule.get("ToPort"),
+                existing_security_group_rule.get("IsEgress"),
+                existing_security_group_rule.get("CidrIpv4"))
+
+    @staticmethod
+    def index_security_group_rules(existing_security_group_rules: list) -> dict:
+        """
+        Returns an index (dictionary) of the given existing AWS security group rules, as returned by the
+        boto3 ec2 describe_security_group_rules function, by their protocol, from/to ports, egress flag,
+        and (IPv4) CIDR; where more than one rule has the same such values the first one is indexed.
+        This may be passed (in place of the list of rules) to find_security_group_rule (and the
+        inbound/outbound variants) to make repeated lookups against the same rules constant time.
+
+        :param existing_security_group_rules: List of AWS security group rules.
+        :return: Dictionary of AWS security group rules by (protocol, from port, to port, egress, CIDR).
+        """
+        security_group_rules_index = {}
         for existing_security_group_rule in existing_security_group_rules or []:
-            if (security_group_rule.get("IpProtocol") == existing_security_group_rule.get("IpProtocol")
-               and security_group_rule.get("FromPort") == existing_security_group_rule.get("FromPort")
-               and security_group_rule.get("ToPort") == existing_security_group_rule.get("ToPort")
-               and outbound == existing_security_group_rule.get("IsEgress")):
-                security_group_rule_ip_ranges = security_group_rule.get("IpRanges")
-                if isinstance(security_group_rule_ip_ranges, list) and len(security_group_rule_ip_ranges) == 1:
-                    if security_group_rule_ip_ranges[0].get("CidrIp") == existing_security_group_rule.get("CidrIpv4"):
-                        return existing_security_group_rule
-        return None
+            security_group_rules_index.setdefault(Aws._get_security_group_rule_index_key(existing_security_group_rule),
+                                                  existing_security_group_rule)
+        return security_group_rules_index
 
     @staticmethod
-    def find_inbound_security_group_rule(existing_security_group_rules: list,
+    def find_inbound_security_group_rule(existing_security_group_rules: Union[Iterable, dict],
                                          security_group_rule: dict) -> Optional[dict]:
         """
         Returns from the given existing AWS inbound security group rules, the (single) one that matches
@@ -465,14 +672,14 @@ class Aws(AwsContext):
         ec2 authorize_security_group_ingress functions.
         N.B. Ignores the description portion of the rule in comparison.
 
-        :param existing_security_group_rules: List of AWS security group rules.
+        :param existing_security_group_rules: List/iterator (or index_security_group_rules index) of rules.
         :param security_group_rule: AWS security group rule.
         :return: AWS inbound security group rule from the given existing rules that matches the given rule.
         """
         return Aws.find_security_group_rule(existing_security_group_rules, security_group_rule, outbound=False)
 
     @staticmethod
-    def find_outbound_security_group_rule(existing_security_group_rules: list,
+    def find_outbound_security_group_rule(existing_security_group_rules: Union[Iterable, dict],
                                           security_group_rule: dict) -> Optional[dict]:
         """
         Returns from the given existing AWS inbound security group rules, the (single) one that matches
@@ -481,7 +688,7 @@ class Aws(AwsContext):
         ec2 authorize_security_group_ingress functions.
         N.B. Ignores the description portion of the rule in comparison.
 
-        :param existing_security_group_rules: List of AWS security group rules.
+        :param existing_security_group_rules: List/iterator (or index_security_group_rules index) of rules.
         :param security_group_rule: AWS security group rule.
         :return: AWS inbound security group rule from the given existing rules that matches the given rule.
         """
@@ -537,45 +744,34 @@ class Aws(AwsContext):
         #    "IpRanges": [{ "CidrIp": sentieon_server_cidr,
         #                   "Description": "allows communication with sentieon server" }],
         # }]
-        from_port = security_group_rule.get("FromPort")
-        to_port = security_group_rule.get("ToPort")
-        ip_protocol = security_group_rule.get("IpProtocol")
-        rule_protocol = ip_protocol.upper()
-        rule_port_range = from_port
         rule_source_or_destination = security_group_rule.get("CidrIpv4")
         if not rule_source_or_destination:
             ip_ranges = security_group_rule.get("IpRanges")
             if ip_ranges:
                 rule_source_or_destination = ip_ranges[0].get("CidrIp")
-        if ip_protocol == "tcp" and from_port == to_port == 22:
-            rule_type = "SSH"
-        elif ip_protocol == "tcp" and from_port == to_port == 80:
-            rule_type = "HTTP"
-        elif ip_protocol == "tcp" and from_port == to_port == 443:
-            rule_type = "HTTPS"
+        return Aws._get_security_group_rule_display_value(security_group_rule.get("IpProtocol"),
+                                                          security_group_rule.get("FromPort"),
+                                                          security_group_rule.get("ToPort"),
+                                                          rule_source_or_destination)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def _get_security_group_rule_display_value(ip_protocol: str,
+                                               from_port: Optional[int],
+                                               to_port: Optional[int],
+                                               rule_source_or_destination: Optional[str]) -> str:
+        # Cached as the same rules (protocol, ports, source/destination) are common across security groups.
+        rule_protocol = ip_protocol.upper()
+        rule_port_range = from_port
+        if (ip_protocol, from_port, to_port) in Aws._SECURITY_GROUP_RULE_TYPES:
+            rule_type = Aws._SECURITY_GROUP_RULE_TYPES[(ip_protocol, from_port, to_port)]
         elif ip_protocol == "icmp" and to_port == -1:
             if from_port == -1:
                 rule_type = "Custom ICMP - IPv4"
             else:
                 rule_type = "All ICMP - IPv4"
-            if from_port == 3:
-                rule_protocol = "Destination Unreachable"
-                rule_port_range = "All"
-            elif from_port == 4:
-                rule_protocol = "Source Quench"
-                rule_port_range = "N/A"
-            elif from_port == 8:
-                rule_protocol = "Echo Request"
-                rule_port_range = "N/A"
-            elif from_port == 11:
-                rule_protocol = "Time Exceeded"
-                rule_port_range = "All"
-            else:
-                rule_protocol = "ICMP"
-                if from_port < 0:
-                    rule_port_range = "All"
-                else:
-                    rule_port_range = f"{from_port}"
+            rule_protocol, rule_port_range = Aws._SECURITY_GROUP_RULE_ICMP_TYPES.get(
+                from_port, ("ICMP", "All" if from_port < 0 else f"{from_port}"))
         else:
             if ip_protocol == "tcp":
                 rule_type = "Custom TCP"
@@ -608,20 +804,35 @@ class Aws(AwsContext):
         :param stack_output_key_name: AWS stack output key name.
         :return: Value of the given AWS stack output key name of the given stack name, or None.
         """
-        with super().establish_credentials():
-            # Using dcicutils.cloudformation_utils.find_stack_output here even though it looks
-            # for the given stack output key name across all stacks, as this output key name
-            # should be be unique across stacks. See discussion on Slack with Kent/Will/David
-            # from 2022-07-11 @ 3:19pm for some commentary on this. Was previously doing:
-            # stacks = boto3.resource('cloudformation').stacks.all()
-            # for stack in stacks:
-            #     if stack.name == stack_name:
-            #         for stack_output in stack.outputs:
-            #             if stack_output["OutputKey"] == stack_output_key_name:
-            #                 return stack_output["OutputValue"]
-            ignored(stack_name)
-            c4 = C4OrchestrationManager()
-            return c4.find_stack_output(stack_output_key_name, value_only=True)
+        # Looking for the given stack output key name across all stacks (rather than just within
+        # the given stack name), as this output key name should be be unique across stacks.
+        # See discussion on Slack with Kent/Will/David from 2022-07-11 @ 3:19pm for some
+        # commentary on this. Was previously doing (or via C4OrchestrationManager.find_stack_output):
+        # stacks = boto3.resource('cloudformation').stacks.all()
+        # for stack in stacks:
+        #     if stack.name == stack_name:
+        #         for stack_output in stack.outputs:
+        #             if stack_output["OutputKey"] == stack_output_key_name:
+        #                 return stack_output["OutputValue"]
+        ignored(stack_name)
+        return self.get_all_stack_outputs().get(stack_output_key_name)
+
+    def get_all_stack_outputs(self) -> dict:
+        """
+        Returns all of the AWS stack output values, across all stacks, by output key name.
+        These are read (across all stacks) just once and then cached; so looking up
+        several stack output values (see get_stack_output_value) reads the stacks once.
+        As with C4OrchestrationManager.find_stack_outputs, if the same output key name
+        is found in more than one stack, then the value from the last one found is used.
+
+        :return: Dictionary of all AWS stack output values by output key name.
+        """
+        if self._stack_output_values is None:
+            with super().establish_credentials():
+                c4 = C4OrchestrationManager()
+                self._stack_output_values = c4.find_stack_outputs(lambda stack_output_key_name: True,
+                                                                  value_only=False)
+        return self._stack_output_values
 
     def get_cors_rules(self, bucket_name: str) -> Optional[list]:
         """
@@ -632,7 +843,7 @@ class Aws(AwsContext):
         :return: List of CORS rules for the given AWS S3 bucket name, or EMPTY list, or None.
         """
         with super().establish_credentials():
-            s3 = boto3.client('s3')
+            s3 = self._client("s3")
             try:
                 response = s3.get_bucket_cors(Bucket=bucket_name)
                 if response:
@@ -656,5 +867,5 @@ class Aws(AwsContext):
         :param cors_rules: List of AWS CORS rules to set for the given AWS S3 bucket.
         """
         with super().establish_credentials():
-            s3 = boto3.client('s3')
+            s3 = self._client("s3")
             s3.put_bucket_cors(Bucket=bucket_name, CORSConfiguration={"CORSRules": cors_rules})
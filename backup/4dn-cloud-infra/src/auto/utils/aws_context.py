@@ -2,7 +2,7 @@ import boto3
 import contextlib
 import os
 from dcicutils.misc_utils import PRINT
-from .misc_utils import obfuscate
+from .misc_utils import (get_symlink_target, obfuscate)
 
 
 class AwsContext:
@@ -51,6 +51,10 @@ class AwsContext:
         self._aws_session_token = aws_session_token
         self._aws_credentials_dir = aws_credentials_dir
         self._reset_boto3_default_session = True
+        self._boto3_session = None
+        self._boto3_clients = {}
+        self._credentials = None
+        self._caller_identity = None
 
     class Credentials:
         def __init__(self,
@@ -76,10 +80,20 @@ class AwsContext:
         manager context) blow away any pertinent AWS credentials related environment variables,
         and set them appropriately based on given EXPLICITLY specified credentials information.
 
+        Re-entrant: if credentials are already established (i.e. this is a nested context, e.g. one
+        Aws method calling another, or a caller wrapping a whole multi-call workflow in this context),
+        then this simply yields the already established credentials, doing nothing else
+        (other than printing their summary if display is True).
+
         :param display: If True then PRINT summary of AWS credentials.
         :param show: If True and display True show in plaintext sensitive info for AWS credentials summary.
         :return: Yields populated (nested class) Credentials object.
         """
+        if self._credentials:
+            if display:
+                self._display_credentials(self._credentials, show)
+            yield self._credentials
+            return
 
         def unset_environ(environment_variables: list) -> dict:
             saved_environment_variables = {}
@@ -134,8 +148,7 @@ class AwsContext:
                 if not os.path.isfile(aws_credentials_file):
                     raise Exception(f"AWS credentials file not found: {aws_credentials_file}")
                 os.environ["AWS_SHARED_CREDENTIALS_FILE"] = aws_credentials_file
-                aws_credentials_dir_symlink_target = (os.readlink(aws_credentials_dir)
-                                                      if os.path.islink(aws_credentials_dir) else None)
+                aws_credentials_dir_symlink_target = get_symlink_target(aws_credentials_dir)
             else:
                 raise Exception(f"No AWS credentials specified.")
             if self._aws_region:
@@ -145,13 +158,19 @@ class AwsContext:
                 if os.path.isfile(aws_config_file):
                     os.environ["AWS_CONFIG_FILE"] = aws_config_file
 
-            # Setup AWS boto3 session/client to get basic AWS credentials info;
-            session = boto3.session.Session()
+            # Setup AWS boto3 session/client to get basic AWS credentials info; the session (and its
+            # clients, see _client) are created once per (outermost) context and reused within it,
+            # i.e. by nested contexts; they are discarded when it exits (see _clear_credentials_caches)
+            # since the credentials (e.g. in the credentials file) may be changed between contexts.
+            self._boto3_session = session = boto3.session.Session()
             session_credentials = session.get_credentials()
             if not session_credentials:
                 raise Exception("AWS session credentials cannot be determined.")
-            caller_identity = boto3.client("sts").get_caller_identity()
-            if not session_credentials:
+            # The caller identity (via STS) is likewise kept for the life of the (outermost) context.
+            if not self._caller_identity:
+                self._caller_identity = session.client("sts").get_caller_identity()
+            caller_identity = self._caller_identity
+            if not caller_identity:
                 raise Exception("AWS caller identity cannot be determined.")
             account_number = caller_identity["Account"]
             user_arn = caller_identity["Arn"]
@@ -167,20 +186,61 @@ class AwsContext:
                                                  account_number=account_number,
                                                  user_arn=user_arn)
             if display:
-                if aws_credentials_dir_symlink_target:
-                    PRINT(f"Your AWS credentials directory (link): {aws_credentials_dir}@ ->")
-                    PRINT(f"Your AWS credentials directory (real): {aws_credentials_dir_symlink_target}")
-                else:
-                    PRINT(f"Your AWS credentials directory: {aws_credentials_dir}")
-                PRINT(f"Your AWS access key: {credentials.access_key_id}")
-                PRINT(f"Your AWS access secret: {obfuscate(credentials.secret_access_key, show)}")
-                PRINT(f"Your AWS region: {credentials.region}")
-                PRINT(f"Your AWS account number: {credentials.account_number}")
-                PRINT(f"Your AWS account user ARN: {credentials.user_arn}")
+                self._display_credentials(credentials, show)
 
             # Yield pertinent AWS credentials info for caller in case they need/want them.
+            self._credentials = credentials
             yield credentials
 
         finally:
+            self._credentials = None
+            self._clear_credentials_caches()
             # Restore any deleted/modified AWS credentials related environment variables.
             restore_environ(saved_environ)
+
+    @staticmethod
+    def _display_credentials(credentials: Credentials, show: bool = False) -> None:
+        """
+        PRINTs a summary of the given AWS credentials.
+
+        :param credentials: AWS credentials as yielded by establish_credentials.
+        :param show: If True show in plaintext sensitive info for AWS credentials summary.
+        """
+        if credentials.credentials_dir_symlink_target:
+            PRINT(f"Your AWS credentials directory (link): {credentials.credentials_dir}@ ->")
+            PRINT(f"Your AWS credentials directory (real): {credentials.credentials_dir_symlink_target}")
+        else:
+            PRINT(f"Your AWS credentials directory: {credentials.credentials_dir}")
+        PRINT(f"Your AWS access key: {credentials.access_key_id}")
+        PRINT(f"Your AWS access secret: {obfuscate(credentials.secret_access_key, show)}")
+        PRINT(f"Your AWS region: {credentials.region}")
+        PRINT(f"Your AWS account number: {credentials.account_number}")
+        PRINT(f"Your AWS account user ARN: {credentials.user_arn}")
+
+    def _clear_credentials_caches(self) -> None:
+        """
+        Called when the (outermost) establish_credentials context exits; clears any
+        cached values which are only valid within a single credentials context,
+        i.e. the boto3 session, its clients, and the caller identity; derived classes
+        may override this to clear their own such values, and must call this as well.
+        """
+        self._boto3_session = None
+        self._boto3_clients = {}
+        self._caller_identity = None
+
+    def _client(self, service_name: str) -> object:
+        """
+        Returns the boto3 client for the given AWS service name, created from the boto3 session for
+        this AWS context, and cached for the life of the (outermost) establish_credentials context.
+        Must be called from within establish_credentials; raises an exception if not.
+
+        :param service_name: AWS service name (e.g. iam, kms).
+        :return: boto3 client for the given AWS service name.
+        """
+        if not self._credentials:
+            raise Exception("AWS credentials not established.")
+        client = self._boto3_clients.get(service_name)
+        if not client:
+            client = self._boto3_session.client(service_name)
+            self._boto3_clients[service_name] = client
+        return client
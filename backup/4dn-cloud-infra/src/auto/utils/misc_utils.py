@@ -2,18 +2,17 @@
 
 import binascii
 import contextlib
-import copy
+import functools
+import hashlib
 import io
 import json
 import os
-import pbkdf2
-from prettytable import PrettyTable
 import re
 import secrets
-import subprocess
+import sys
 from .paths import MiscFiles
 from typing import Callable, Optional
-from dcicutils.misc_utils import (json_leaf_subst as expand_json_template, PRINT)
+from dcicutils.misc_utils import PRINT
 
 
 def get_json_config_file_value(name: str, config_file: str, fallback: str = None) -> Optional[str]:
@@ -28,14 +27,42 @@ def get_json_config_file_value(name: str, config_file: str, fallback: str = None
     :return: Named value from given JSON config file or given fallback.
     """
     try:
-        with io.open(config_file, "r") as config_fp:
-            config_json = json.load(config_fp)
-            value = config_json.get(name)
-            return value if value else fallback
+        config_file = os.path.abspath(config_file)
+        config_json = _load_json_config_file(config_file, os.path.getmtime(config_file))
+        value = config_json.get(name)
+        return value if value else fallback
     except Exception:
         return fallback
 
 
+@functools.lru_cache(maxsize=None)
+def _load_json_config_file(config_file: str, config_file_mtime: float) -> dict:
+    """
+    Reads and returns the JSON from the given JSON config file; cached by file path
+    and modification time so it is read/parsed once per invocation, unless modified.
+
+    :param config_file: Full (absolute) path of the JSON config file.
+    :param config_file_mtime: Modification time of the JSON config file (part of the cache key).
+    :return: JSON from the given config file.
+    """
+    with io.open(config_file, "r") as config_fp:
+        return json.load(config_fp)
+
+
+def get_symlink_target(path: str) -> Optional[str]:
+    """
+    Returns the target of the given path if it is a symbolic link, otherwise None.
+    Does this with a single readlink call rather than an islink check followed by readlink.
+
+    :param path: Path name.
+    :return: Target of the given path if it is a symbolic link, otherwise None.
+    """
+    try:
+        return os.readlink(path)
+    except OSError:
+        return None
+
+
 def expand_json_template_file(template_file: str, output_file: str, template_substitutions: dict) -> None:
     """
     Expands the JSON template file specified by the given :param:`template_file`
@@ -48,18 +75,49 @@ def expand_json_template_file(template_file: str, output_file: str, template_sub
     """
     with io.open(template_file, "r") as template_fp:
         template_file_json = json.load(template_fp)
-    expanded_template_json = expand_json_template(template_file_json, template_substitutions)
+    expanded_template_json = _expand_json_template_in_place(template_file_json, template_substitutions)
     with io.open(output_file, "w") as output_fp:
         json.dump(expanded_template_json, output_fp, indent=2)
         output_fp.write("\n")
 
 
+def _expand_json_template_in_place(template_json, template_substitutions: dict):
+    """
+    Same as dcicutils.misc_utils.json_leaf_subst, i.e. replaces any (dictionary key or leaf) value
+    which exactly matches a key in the given template substitutions with its substitution value,
+    but modifies the given JSON in place rather than building a (full) copy of it.
+
+    :param template_json: JSON in which to do the substitutions (in place).
+    :param template_substitutions: Dictionary of substitution keys/values.
+    :return: Given JSON with its substitutions made; only a different object if itself substituted.
+    """
+    if isinstance(template_json, dict):
+        if any(key in template_substitutions for key in template_json):
+            # Rebuild the keys in their original order if any of them are substituted.
+            items = list(template_json.items())
+            template_json.clear()
+            template_json.update((template_substitutions.get(key, key), value) for key, value in items)
+        for key, value in template_json.items():
+            template_json[key] = _expand_json_template_in_place(value, template_substitutions)
+    elif isinstance(template_json, list):
+        for index, value in enumerate(template_json):
+            template_json[index] = _expand_json_template_in_place(value, template_substitutions)
+    elif template_json in template_substitutions:
+        return template_substitutions[template_json]
+    return template_json
+
+
+# Simple shell variable assignment line, e.g.: export NAME=value or NAME="value"
+_SHELL_SCRIPT_ASSIGNMENT_REGEX = re.compile(r"^\s*(?:export\s+)?([A-Za-z_][A-Za-z0-9_]*)=(.*)$")
+
+
 def get_script_exported_variable(shell_script_file: str, env_variable_name: str) -> Optional[str]:
     """
-    Obtains/returns the value of the given environment variable name by actually
-    executing the given shell script file in a sub-shell.
+    Obtains/returns the value of the given environment variable name from the given shell script
+    file; if the script contains only simple (non-expanding) variable assignments then it is parsed
+    directly, otherwise by actually executing the given shell script file in a sub-shell.
 
-    WARNING: Since the given full (bash) script file is actually executed, be very
+    WARNING: Since the given full (bash) script file may actually be executed, be very
              CAREFUL what you pass here; i.e. that it has no unwanted side-effects.
 
     :param shell_script_file: Shell script file to execute.
@@ -69,6 +127,11 @@ def get_script_exported_variable(shell_script_file: str, env_variable_name: str)
     try:
         if not os.path.isfile(shell_script_file):
             return None
+        parsed, value = _parse_script_exported_variable(shell_script_file, env_variable_name)
+        if parsed:
+            return value
+        # Imported here as only needed for (the less common) scripts which cannot simply be parsed.
+        import subprocess
         # If we don't do unset first it inherits from any current environment variable of the name.
         command = f"unset {env_variable_name} ; source {shell_script_file} ; echo ${env_variable_name}"
         result = subprocess.run(command, shell=True, encoding="utf-8", capture_output=True, executable="/bin/bash")
@@ -79,6 +142,42 @@ def get_script_exported_variable(shell_script_file: str, env_variable_name: str)
         return None
 
 
+def _parse_script_exported_variable(shell_script_file: str, env_variable_name: str) -> (bool, Optional[str]):
+    """
+    Parses (without executing) the given shell script file for the value of the given environment
+    variable name; only possible if the script contains only blank lines, comments, and simple variable
+    assignments with no expansions (e.g. $, backticks, tilde) or whitespace/globbing; the last assignment wins.
+
+    :param shell_script_file: Shell script file to parse.
+    :param env_variable_name: Environment variable name to read.
+    :return: Tuple with True and the variable value (None if not set) if parsable, otherwise False and None.
+    """
+    value = None
+    with io.open(shell_script_file, "r") as shell_script_fp:
+        for line in shell_script_fp:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if "$" in line or "`" in line:
+                return False, None
+            match = _SHELL_SCRIPT_ASSIGNMENT_REGEX.match(line)
+            if not match:
+                return False, None
+            line_value = match.group(2)
+            if len(line_value) >= 2 and line_value[0] == line_value[-1] and line_value[0] in "\"'":
+                line_value = line_value[1:-1]
+            # Anything which the shell might interpret (e.g. quoting, whitespace, globbing, tilde) is not simple.
+            if any(c in line_value for c in " \t\"'\\;&|<>()*?[~"):
+                return False, None
+            if match.group(1) == env_variable_name:
+                value = line_value
+    # Like echo of an unset or empty variable, which the sub-shell version treats as None.
+    return True, value or None
+
+
+_SYSTEM_RANDOM = secrets.SystemRandom()
+
+
 def generate_password() -> str:
     """
     Returns a reasonably secure password, by simply concatenating 5 random words from the system
@@ -96,10 +195,9 @@ def generate_password() -> str:
         dictionary_words_file = None
     if dictionary_words_file:
         try:
-            with io.open(dictionary_words_file) as dictionary_words_fp:
-                words = [word.strip() for word in dictionary_words_fp]
-                if len(words) > 10000:
-                    password = " ".join(secrets.choice(words) for _ in range(5))
+            words = _load_dictionary_words(dictionary_words_file)
+            if len(words) > 10000:
+                password = " ".join(_SYSTEM_RANDOM.sample(words, 5))
         except Exception:
             pass
     if not password:
@@ -107,6 +205,18 @@ def generate_password() -> str:
     return password
 
 
+@functools.lru_cache(maxsize=1)
+def _load_dictionary_words(dictionary_words_file: str) -> tuple:
+    """
+    Reads and returns the words from the given dictionary words file; cached so it is read once.
+
+    :param dictionary_words_file: Full path of the dictionary words file.
+    :return: Tuple of the words from the given dictionary words file.
+    """
+    with io.open(dictionary_words_file) as dictionary_words_fp:
+        return tuple(dictionary_words_fp.read().splitlines())
+
+
 def generate_encryption_key(length: int = 32) -> str:
     """
     Generate a cryptographically secure encryption key suitable for AWS S3 (or other) encryption.
@@ -124,12 +234,23 @@ def generate_encryption_key(length: int = 32) -> str:
     elif length % 2 != 0:
         length += 1
     password_salt = os.urandom(16)
-    # Integer floor (//) division by two of length because read returns double the length of this argument value.
-    encryption_key = pbkdf2.PBKDF2(generate_password(), password_salt).read(length // 2)
+    # Integer floor (//) division by two of length because hexlify returns double the length of the key.
+    encryption_key = hashlib.pbkdf2_hmac("sha256", generate_password().encode("utf-8"), password_salt,
+                                         iterations=100_000, dklen=length // 2)
     encryption_key = binascii.hexlify(encryption_key).decode("utf-8")
     return encryption_key
 
 
+_SECRET_KEY_NAMES_REGEX = re.compile(
+    r"""
+    secret   |
+    secrt    |
+    password |
+    passwd   |
+    crypt(?!_key_id$)
+    """, re.VERBOSE | re.IGNORECASE)
+
+
 def should_obfuscate(key: str) -> bool:
     """
     Returns True if the given key looks like it represents a secret value.
@@ -141,17 +262,9 @@ def should_obfuscate(key: str) -> bool:
     :param key: Key name of some property which may or may not need to be obfuscated.
     :return: True if the given key name looks like it represents a sensitive value.
     """
-    secret_key_names_regex = re.compile(
-        r"""
-        .*(
-            secret   |
-            secrt    |
-            password |
-            passwd   |
-            crypt(?!_key_id$)
-        ).*
-        """, re.VERBOSE | re.IGNORECASE)
-    return secret_key_names_regex.match(key) is not None
+    if not key or not isinstance(key, str):
+        return False
+    return _SECRET_KEY_NAMES_REGEX.search(key) is not None
 
 
 def obfuscate(value: str, show: bool = False) -> str:
@@ -162,14 +275,19 @@ def obfuscate(value: str, show: bool = False) -> str:
     :param show: If True then do not actually obfuscate rather return value in plaintext.
     :return: Obfuscated (or not if show) value or empty string if not a string or empty.
     """
-    return value if show else len(value) * "*"
+    if show:
+        return value
+    if not value or not isinstance(value, str):
+        return ""
+    return len(value) * "*"
 
 
 def obfuscate_dict(dictionary: dict, show: bool = False) -> Optional[dict]:
     """
     Obfuscates all string values within the given dictionary, recursively, based on whether or not
     their key names look like they represent a secret value (based on the should_obfuscate function).
-    Note that a COPY of the dictionary is returned; the given dictionary is NOT modified.
+    Note that a COPY of the dictionary is returned; the given dictionary is NOT modified;
+    the (nested) dictionaries are copied but any other (non-obfuscated) values are shared.
 
     :param dictionary: Given dictionary to obfuscate.
     :param show: If True then do not actualy obfuscate, just return given dictionary.
@@ -178,13 +296,24 @@ def obfuscate_dict(dictionary: dict, show: bool = False) -> Optional[dict]:
         return None
     if isinstance(show, bool) and show:
         return dictionary
-    dictionary = copy.deepcopy(dictionary)
-    for key, value in dictionary.items():
-        if isinstance(value, dict):
-            dictionary[key] = obfuscate_dict(value)
-        elif isinstance(value, str) and should_obfuscate(key):
-            dictionary[key] = obfuscate(value)
-    return dictionary
+
+    def obfuscate_dict_copy(dictionary: dict, copies: dict) -> dict:
+        # Builds the obfuscated copy in a single pass (i.e. rather than a deepcopy and then another pass);
+        # copies (by id) of any nested dictionaries already seen are reused, so any (shared) dictionary
+        # appearing more than once (or within itself) is only walked, and copied, once.
+        dictionary_copy = copies.get(id(dictionary))
+        if dictionary_copy is None:
+            copies[id(dictionary)] = dictionary_copy = {}
+            for key, value in dictionary.items():
+                if isinstance(value, dict):
+                    dictionary_copy[key] = obfuscate_dict_copy(value, copies)
+                elif isinstance(value, str) and should_obfuscate(key):
+                    dictionary_copy[key] = obfuscate(value)
+                else:
+                    dictionary_copy[key] = value
+        return dictionary_copy
+
+    return obfuscate_dict_copy(dictionary, {})
 
 
 def get_exception_string(exception) -> str:
@@ -210,7 +339,7 @@ def exit_with_no_action(*messages, status: int = 1) -> None:
     for message in messages:
         PRINT(message)
     PRINT("Exiting without doing anything.")
-    exit(status)
+    sys.exit(status)
 
 
 def exit_with_partial_action(*messages, status: int = 1) -> None:
@@ -224,7 +353,7 @@ def exit_with_partial_action(*messages, status: int = 1) -> None:
     for message in messages:
         PRINT(message)
     print_warning("Exiting mid-action!")
-    exit(status)
+    sys.exit(status)
 
 
 @contextlib.contextmanager
@@ -256,7 +385,7 @@ def setup_and_action():
                 exit_with_partial_action("\n", message)
             else:
                 exit_with_no_action("\n", message)
-            exit(1)
+            sys.exit(1)
 
     state = SetupActionState()
     try:
@@ -283,14 +412,16 @@ def print_directory_tree(directory: str) -> None:
     # This function adapted from stackoverflow:
     # Ref: https://stackoverflow.com/questions/9727673/list-directory-tree-structure-in-python
     def tree_generator(dirname: str, prefix: str = ""):
-        contents = [os.path.join(dirname, item) for item in sorted(os.listdir(dirname))]
-        pointers = [tee] * (len(contents) - 1) + [last]
-        for pointer, path in zip(pointers, contents):
-            symlink = "@ -> " + os.readlink(path) if os.path.islink(path) else ""
-            yield prefix + pointer + os.path.basename(path) + symlink
-            if os.path.isdir(path):
+        # N.B. Using scandir so the symlink/directory checks below use the (cached) directory entry types.
+        with os.scandir(dirname) as entries:
+            contents = sorted(entries, key=lambda entry: entry.name)
+        for index, entry in enumerate(contents):
+            pointer = last if index == len(contents) - 1 else tee
+            symlink = "@ -> " + os.readlink(entry.path) if entry.is_symlink() else ""
+            yield prefix + pointer + entry.name + symlink
+            if entry.is_dir():
                 extension = branch if pointer == tee else space
-                yield from tree_generator(path, prefix=prefix+extension)
+                yield from tree_generator(entry.path, prefix=prefix+extension)
     PRINT(first + directory)
     for line in tree_generator(directory, prefix="   "):
         PRINT(line)
@@ -298,12 +429,15 @@ def print_directory_tree(directory: str) -> None:
 
 def print_dictionary_as_table(header_name: str, header_value: str,
                               dictionary: dict, display_value: Callable, sort: bool = True) -> None:
-    table = PrettyTable()
-    table.field_names = [header_name, header_value]
-    table.align[header_name] = "l"
-    table.align[header_value] = "l"
+    # Formatted directly, in the same (left-aligned) style as PrettyTable, rather than via PrettyTable.
     if not callable(display_value):
         display_value = lambda _, value: value
-    for key_name, key_value in sorted(dictionary.items(), key=lambda item: item[0]) if sort else dictionary.items():
-        table.add_row([key_name, display_value(key_name, key_value)])
-    PRINT(table)
+    items = sorted(dictionary.items(), key=lambda item: item[0]) if sort else dictionary.items()
+    rows = [(str(key_name), str(display_value(key_name, key_value))) for key_name, key_value in items]
+    name_width = max([len(header_name)] + [len(name) for name, _ in rows])
+    value_width = max([len(header_value)] + [len(value) for _, value in rows])
+    separator = f"+-{'-' * name_width}-+-{'-' * value_width}-+"
+    lines = [separator, f"| {header_name.ljust(name_width)} | {header_value.ljust(value_width)} |", separator]
+    lines.extend(f"| {name.ljust(name_width)} | {value.ljust(value_width)} |" for name, value in rows)
+    lines.append(separator)
+    PRINT("\n".join(lines))
@@ -1,5 +1,5 @@
 import os
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
 from dcicutils.misc_utils import PRINT
 from .paths import (InfraDirectories, InfraFiles)
 from ..utils.misc_utils import (
@@ -7,7 +7,9 @@ from ..utils.misc_utils import (
     exit_with_no_action,
     print_exception,
 )
-from .aws import Aws
+if TYPE_CHECKING:
+    # N.B. Otherwise imported (along with boto3) only where actually needed.
+    from .aws import Aws
 
 
 def validate_and_get_custom_dir(custom_dir: str) -> (str, str):
@@ -60,13 +62,14 @@ def validate_and_get_aws_credentials_dir(aws_credentials_dir: str, custom_dir: s
     :return: Full path of the AWS credentials directory.
     """
     if not aws_credentials_dir:
+        # N.B. This path is already a full path.
         aws_credentials_dir = InfraDirectories.get_custom_aws_creds_dir(custom_dir)
         if not aws_credentials_dir:
             exit_with_no_action(f"ERROR: AWS credentials directory cannot be determined.")
-    if aws_credentials_dir:
+    else:
         aws_credentials_dir = os.path.abspath(os.path.expanduser(aws_credentials_dir))
-        if not os.path.isdir(aws_credentials_dir):
-            exit_with_no_action(f"ERROR: AWS credentials directory does not exist: {aws_credentials_dir}")
+    if not os.path.isdir(aws_credentials_dir):
+        exit_with_no_action(f"ERROR: AWS credentials directory does not exist: {aws_credentials_dir}")
     return aws_credentials_dir
 
 
@@ -77,7 +80,7 @@ def validate_and_get_aws_credentials(credentials_name: str,
                                      secret_access_key: str = None,
                                      region: str = None,
                                      session_token: str = None,
-                                     show: bool = False) -> Aws:
+                                     show: bool = False) -> "Aws":
     """
     Validates the given AWS credentials which can be either the path to the AWS credentials directory;
     or the AWS access key ID, secret access key, and region; or the AWS session token.
@@ -115,6 +118,7 @@ def validate_and_get_aws_credentials(credentials_name: str,
     PRINT(f"Your AWS credentials name: {credentials_name}")
 
     # Get AWS credentials context object.
+    from .aws import Aws
     aws = Aws(credentials_dir, access_key_id, secret_access_key, region, session_token)
 
     # Verify the AWS credentials context and get the associated AWS credentials number.
@@ -136,7 +140,7 @@ def validate_and_get_aws_credentials(credentials_name: str,
         print_exception(e)
 
 
-def validate_and_get_s3_encrypt_key_id(s3_encrypt_key_id: str, config_file: str, aws: Aws) -> Optional[str]:
+def validate_and_get_s3_encrypt_key_id(s3_encrypt_key_id: str, config_file: str, aws: "Aws") -> Optional[str]:
     """
     Validates the given S3 encryption key ID and returns its value, but only if encryption
     is enabled via the "s3.bucket.encryption" value in the given JSON config file. If not
@@ -154,11 +158,11 @@ def validate_and_get_s3_encrypt_key_id(s3_encrypt_key_id: str, config_file: str,
         if s3_bucket_encryption:
             # Only needed if s3.bucket.encryption is True in the local custom config file.
             customer_managed_kms_keys = aws.get_customer_managed_kms_keys()
-            if not customer_managed_kms_keys or len(customer_managed_kms_keys) == 0:
+            if not customer_managed_kms_keys:
                 exit_with_no_action("ERROR: Cannot find a customer managed KMS key in AWS.")
             elif len(customer_managed_kms_keys) > 1:
                 PRINT("More than one customer managed KMS key found in AWS:")
-                for customer_managed_kms_key in sorted(customer_managed_kms_keys, key=lambda key: key):
+                for customer_managed_kms_key in sorted(customer_managed_kms_keys):
                     PRINT(f"- {customer_managed_kms_key}")
                 exit_with_no_action("Use --s3-encrypt-key-id to specify specific value.")
             else:
@@ -0,0 +1,19 @@
+import contextlib
+
+
+@contextlib.contextmanager
+def mocked_establish_credentials(self, display: bool = False, show: bool = False):
+    """
+    Mocked replacement for AwsContext.establish_credentials which establishes no actual credentials;
+    like the real one it is re-entrant, and clears the credentials context scoped caches on exit of
+    the outermost context. Use like: mock.patch.object(AwsContext, "establish_credentials", this).
+    """
+    if self._credentials:
+        yield self._credentials
+        return
+    self._credentials = "MOCKED-CREDENTIALS-FOR-TESTING"
+    try:
+        yield self._credentials
+    finally:
+        self._credentials = None
+        self._clear_credentials_caches()
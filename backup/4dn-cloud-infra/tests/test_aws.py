@@ -0,0 +1,367 @@
+import contextlib
+import json
+import mock
+from src.auto.utils import aws, aws_context
+from .aws_testing_utils import mocked_establish_credentials
+
+
+@contextlib.contextmanager
+def mocked_aws(**clients):
+    with mock.patch.object(aws_context.AwsContext, "establish_credentials", mocked_establish_credentials), \
+         mock.patch.object(aws.Aws, "_client", lambda self, service_name: clients[service_name]), \
+         mock.patch.object(aws, "yes_or_no") as mocked_yes_or_no:
+        mocked_yes_or_no.return_value = True
+        yield aws.Aws(), mocked_yes_or_no
+
+
+class StubSecretsManager:
+
+    def __init__(self, secrets: dict) -> None:
+        self.secrets = {secret_name: json.dumps(secret_value) for secret_name, secret_value in secrets.items()}
+        self.get_secret_value_calls = 0
+        self.update_secret_calls = 0
+        self.update_secret_error = None
+
+    def get_secret_value(self, SecretId: str) -> dict:  # noQA - Argument names chosen for AWS consistency
+        self.get_secret_value_calls += 1
+        return {"Name": SecretId, "SecretString": self.secrets[SecretId]}
+
+    def update_secret(self, SecretId: str, SecretString: str) -> None:  # noQA
+        self.update_secret_calls += 1
+        if self.update_secret_error:
+            raise self.update_secret_error
+        self.secrets[SecretId] = SecretString
+
+    def get_secret_json(self, secret_name: str) -> dict:
+        return json.loads(self.secrets[secret_name])
+
+
+class StubEc2:
+
+    def __init__(self, security_groups: list = None, security_group_rule_pages: list = None) -> None:
+        self.security_groups = security_groups or []
+        self.security_group_rule_pages = security_group_rule_pages or []
+        self.describe_security_groups_calls = 0
+        self.describe_security_group_rules_next_tokens = []
+        # Set to an Aws object to check that each AWS call is made within its credentials context.
+        self.aws_object = None
+
+    def describe_security_groups(self, Filters: list) -> dict:  # noQA - Argument names chosen for AWS consistency
+        self.describe_security_groups_calls += 1
+        assert Filters[0]["Name"] == "tag:Name"
+        return {"SecurityGroups": [security_group for security_group in self.security_groups
+                                   if any(tag["Key"] == "Name" and tag["Value"] in Filters[0]["Values"]
+                                          for tag in security_group["Tags"])]}
+
+    def describe_security_group_rules(self, Filters: list, NextToken: str = None) -> dict:  # noQA
+        assert not self.aws_object or self.aws_object._credentials
+        self.describe_security_group_rules_next_tokens.append(NextToken)
+        page_index = int(NextToken) if NextToken else 0
+        page = {"SecurityGroupRules": self.security_group_rule_pages[page_index]}
+        if page_index + 1 < len(self.security_group_rule_pages):
+            page["NextToken"] = str(page_index + 1)
+        return page
+
+
+class StubKmsListKeysPaginator:
+
+    def __init__(self, key_pages: list) -> None:
+        self.key_pages = key_pages
+
+    def paginate(self):
+        for key_ids in self.key_pages:
+            yield {"Keys": [{"KeyId": key_id} for key_id in key_ids]}
+
+
+class StubKms:
+
+    def __init__(self, key_pages: list, customer_key_ids: list) -> None:
+        self.key_pages = key_pages
+        self.customer_key_ids = customer_key_ids
+
+    def get_paginator(self, operation_name: str) -> StubKmsListKeysPaginator:
+        assert operation_name == "list_keys"
+        return StubKmsListKeysPaginator(self.key_pages)
+
+    def describe_key(self, KeyId: str) -> dict:  # noQA - Argument names chosen for AWS consistency
+        return {"KeyMetadata": {"KeyId": KeyId, "KeyManager": "CUSTOMER" if KeyId in self.customer_key_ids else "AWS"}}
+
+
+class StubIam:
+
+    class exceptions:  # noQA - Named for AWS consistency
+        class NoSuchEntityException(Exception):
+            pass
+
+    def __init__(self, user_names: list) -> None:
+        self.user_names = user_names
+        self.list_users_calls = 0
+
+    def get_user(self, UserName: str) -> dict:  # noQA - Argument names chosen for AWS consistency
+        # IAM user names are case-insensitive.
+        for user_name in self.user_names:
+            if user_name.lower() == UserName.lower():
+                return {"User": {"UserName": user_name}}
+        raise self.exceptions.NoSuchEntityException(UserName)
+
+    def get_paginator(self, operation_name: str) -> object:
+        assert operation_name == "list_users"
+        self.list_users_calls += 1
+        return mock.Mock(paginate=lambda: iter([{"Users": [{"UserName": user_name}
+                                                           for user_name in self.user_names]}]))
+
+
+def test_update_secret_key_values_merges_and_writes_once() -> None:
+    secrets_manager = StubSecretsManager({"C4Secret": {"a": "1", "b": "2", "c": "3"}})
+    with mocked_aws(secretsmanager=secrets_manager) as (aws_object, mocked_yes_or_no):
+        assert aws_object.update_secret_key_values("C4Secret", {"a": None, "b": "22", "c": "3", "d": "4"}) is True
+        assert secrets_manager.get_secret_json("C4Secret") == {"a": "DEACTIVATED:1", "b": "22", "c": "3", "d": "4"}
+        assert secrets_manager.get_secret_value_calls == 1
+        assert secrets_manager.update_secret_calls == 1
+        # A single confirmation for the whole set of changes.
+        assert mocked_yes_or_no.call_count == 1
+
+
+def test_update_secret_key_values_not_confirmed() -> None:
+    secrets_manager = StubSecretsManager({"C4Secret": {"a": "1"}})
+    with mocked_aws(secretsmanager=secrets_manager) as (aws_object, mocked_yes_or_no):
+        mocked_yes_or_no.return_value = False
+        assert aws_object.update_secret_key_values("C4Secret", {"a": "11"}) is False
+        assert secrets_manager.get_secret_json("C4Secret") == {"a": "1"}
+        assert secrets_manager.update_secret_calls == 0
+
+
+def test_update_secret_key_values_nonexistent_secret() -> None:
+    secrets_manager = StubSecretsManager({})
+    with mocked_aws(secretsmanager=secrets_manager) as (aws_object, mocked_yes_or_no):
+        assert aws_object.update_secret_key_values("C4Secret", {"a": "1"}) is False
+        assert secrets_manager.update_secret_calls == 0
+
+
+def test_update_secret_key_values_cached_within_credentials_context() -> None:
+    secrets_manager = StubSecretsManager({"C4Secret": {"a": "1", "b": "2"}})
+    with mocked_aws(secretsmanager=secrets_manager) as (aws_object, mocked_yes_or_no):
+        with aws_object.establish_credentials():
+            assert aws_object.update_secret_key_values("C4Secret", {"a": "11"}) is True
+            assert aws_object.update_secret_key_values("C4Secret", {"b": "22"}) is True
+            # Second update used the cached secret rather than getting it again.
+            assert secrets_manager.get_secret_value_calls == 1
+            assert secrets_manager.update_secret_calls == 2
+        assert secrets_manager.get_secret_json("C4Secret") == {"a": "11", "b": "22"}
+
+
+def test_update_secret_key_values_refreshed_across_credentials_contexts() -> None:
+    secrets_manager = StubSecretsManager({"C4Secret": {"a": "1", "b": "2"}})
+    with mocked_aws(secretsmanager=secrets_manager) as (aws_object, mocked_yes_or_no):
+        assert aws_object.update_secret_key_values("C4Secret", {"a": "11"}) is True
+        # Changed by someone else; must not be overwritten with a stale cached value.
+        secrets_manager.secrets["C4Secret"] = json.dumps({"a": "11", "b": "2", "x": "someone-else"})
+        assert aws_object.update_secret_key_values("C4Secret", {"b": "22"}) is True
+        assert secrets_manager.get_secret_value_calls == 2
+        assert secrets_manager.get_secret_json("C4Secret") == {"a": "11", "b": "22", "x": "someone-else"}
+
+
+def test_update_secret_key_values_skips_value_just_written() -> None:
+    secrets_manager = StubSecretsManager({"C4Secret": {"a": "1"}})
+    with mocked_aws(secretsmanager=secrets_manager) as (aws_object, mocked_yes_or_no):
+        with aws_object.establish_credentials():
+            assert aws_object.update_secret_key_values("C4Secret", {"a": "11"}) is True
+            # Updating to the value just written is skipped without getting or writing the secret.
+            assert aws_object.update_secret_key_values("C4Secret", {"a": "11"}) is False
+            assert secrets_manager.get_secret_value_calls == 1
+            assert secrets_manager.update_secret_calls == 1
+        # But not in a subsequent context, in which the secret may have since been changed by someone else.
+        secrets_manager.secrets["C4Secret"] = json.dumps({"a": "1"})
+        assert aws_object.update_secret_key_values("C4Secret", {"a": "11"}) is True
+        assert secrets_manager.get_secret_json("C4Secret") == {"a": "11"}
+
+
+def test_update_secret_key_values_write_failure_clears_cache() -> None:
+    secrets_manager = StubSecretsManager({"C4Secret": {"a": "1"}})
+    with mocked_aws(secretsmanager=secrets_manager) as (aws_object, mocked_yes_or_no):
+        with aws_object.establish_credentials():
+            assert aws_object.update_secret_key_values("C4Secret", {"a": "11"}) is True
+            secrets_manager.update_secret_error = Exception("Update secret error for testing.")
+            assert aws_object.update_secret_key_values("C4Secret", {"a": "111"}) is False
+            secrets_manager.update_secret_error = None
+            # The fingerprint of the value written before the failure no longer skips this update,
+            # and the secret is gotten again rather than from the cache.
+            assert aws_object.update_secret_key_values("C4Secret", {"a": "11"}) is False
+            assert secrets_manager.get_secret_value_calls == 2
+            assert aws_object.update_secret_key_values("C4Secret", {"a": "111"}) is True
+        assert secrets_manager.get_secret_json("C4Secret") == {"a": "111"}
+
+
+def test_get_secret_value_cached_within_credentials_context() -> None:
+    secrets_manager = StubSecretsManager({"C4Secret": {"a": "1", "b": "2"}})
+    with mocked_aws(secretsmanager=secrets_manager) as (aws_object, mocked_yes_or_no):
+        with aws_object.establish_credentials():
+            assert aws_object.get_secret_value("C4Secret", "a") == "1"
+            assert aws_object.get_secret_value("C4Secret", "b") == "2"
+            assert aws_object.get_secret_value("C4Secret", "c") is None
+            assert secrets_manager.get_secret_value_calls == 1
+            # Updates within the same context use (and update) the same cached secret.
+            assert aws_object.update_secret_key_values("C4Secret", {"b": "22"}) is True
+            assert aws_object.get_secret_value("C4Secret", "b") == "22"
+            assert secrets_manager.get_secret_value_calls == 1
+        assert aws_object.get_secret_value("C4Secret", "a") == "1"
+        assert secrets_manager.get_secret_value_calls == 2
+
+
+def test_find_security_group_ids() -> None:
+    ec2 = StubEc2(security_groups=[
+        {"GroupId": "sg-0001", "Tags": [{"Key": "Name", "Value": "C4NetworkDBSecurityGroup"}]},
+        {"GroupId": "sg-0002", "Tags": [{"Key": "Stack", "Value": "network"},
+                                        {"Key": "Name", "Value": "C4NetworkHTTPSecurityGroup"}]},
+        {"GroupId": "sg-0003", "Tags": [{"Key": "Name", "Value": "C4NetworkDuplicateSecurityGroup"}]},
+        {"GroupId": "sg-0004", "Tags": [{"Key": "Name", "Value": "C4NetworkDuplicateSecurityGroup"}]}
+    ])
+    with mocked_aws(ec2=ec2) as (aws_object, mocked_yes_or_no):
+        security_group_names = ["C4NetworkDBSecurityGroup", "C4NetworkHTTPSecurityGroup",
+                                "C4NetworkDuplicateSecurityGroup", "C4NetworkNonExistentSecurityGroup"]
+        assert aws_object.find_security_group_ids(security_group_names) == {
+            "C4NetworkDBSecurityGroup": "sg-0001",
+            "C4NetworkHTTPSecurityGroup": "sg-0002",
+            "C4NetworkDuplicateSecurityGroup": None,
+            "C4NetworkNonExistentSecurityGroup": None
+        }
+        assert ec2.describe_security_groups_calls == 1
+        # Found IDs are cached.
+        assert aws_object.find_security_group_id("C4NetworkDBSecurityGroup") == "sg-0001"
+        assert aws_object.find_security_group_ids(["C4NetworkDBSecurityGroup", "C4NetworkHTTPSecurityGroup"]) == {
+            "C4NetworkDBSecurityGroup": "sg-0001",
+            "C4NetworkHTTPSecurityGroup": "sg-0002"
+        }
+        assert ec2.describe_security_groups_calls == 1
+        # Those not found are not cached.
+        assert aws_object.find_security_group_id("C4NetworkNonExistentSecurityGroup") is None
+        assert ec2.describe_security_groups_calls == 2
+
+
+SECURITY_GROUP_RULES = [
+    {"SecurityGroupRuleId": "sgr-0001", "IsEgress": False, "IpProtocol": "tcp",
+     "FromPort": 443, "ToPort": 443, "CidrIpv4": "10.0.0.0/16"},
+    {"SecurityGroupRuleId": "sgr-0002", "IsEgress": True, "IpProtocol": "icmp",
+     "FromPort": 4, "ToPort": -1, "CidrIpv4": "0.0.0.0/0"},
+    {"SecurityGroupRuleId": "sgr-0003", "IsEgress": False, "IpProtocol": "tcp",
+     "FromPort": 443, "ToPort": 443, "CidrIpv4": "10.0.0.0/16"},
+    {"SecurityGroupRuleId": "sgr-0004", "IsEgress": True, "IpProtocol": "tcp",
+     "FromPort": 8990, "ToPort": 8990, "CidrIpv4": "10.0.68.248/32"},
+    {"SecurityGroupRuleId": "sgr-0005", "IsEgress": False, "IpProtocol": "tcp",
+     "FromPort": 22, "ToPort": 22, "CidrIpv4": "10.0.0.0/16"}
+]
+
+
+def test_iter_security_group_rules_pagination() -> None:
+    ec2 = StubEc2(security_group_rule_pages=[SECURITY_GROUP_RULES[0:2], SECURITY_GROUP_RULES[2:4],
+                                             SECURITY_GROUP_RULES[4:]])
+    with mocked_aws(ec2=ec2) as (aws_object, mocked_yes_or_no):
+        ec2.aws_object = aws_object
+        assert list(aws_object.iter_security_group_rules("sg-0001")) == SECURITY_GROUP_RULES
+        assert ec2.describe_security_group_rules_next_tokens == [None, "1", "2"]
+        # The credentials context is exited when the iteration completes.
+        assert not aws_object._credentials
+
+
+def test_iter_security_group_rules_early_exit() -> None:
+    ec2 = StubEc2(security_group_rule_pages=[SECURITY_GROUP_RULES[0:2], SECURITY_GROUP_RULES[2:4],
+                                             SECURITY_GROUP_RULES[4:]])
+    with mocked_aws(ec2=ec2) as (aws_object, mocked_yes_or_no):
+        ec2.aws_object = aws_object
+        security_group_rule = {"IpProtocol": "icmp", "FromPort": 4, "ToPort": -1,
+                               "IpRanges": [{"CidrIp": "0.0.0.0/0", "Description": "ICMP for testing"}]}
+        found_security_group_rule = aws_object.find_outbound_security_group_rule(
+            aws_object.iter_security_group_rules("sg-0001"), security_group_rule)
+        assert found_security_group_rule["SecurityGroupRuleId"] == "sgr-0002"
+        # Found on the first page so no more pages were fetched.
+        assert ec2.describe_security_group_rules_next_tokens == [None]
+        # And the credentials context is exited when the (early exited) generator is closed.
+        assert not aws_object._credentials
+
+
+def test_get_inbound_and_outbound_security_group_rules() -> None:
+    ec2 = StubEc2(security_group_rule_pages=[SECURITY_GROUP_RULES[0:2], SECURITY_GROUP_RULES[2:4],
+                                             SECURITY_GROUP_RULES[4:]])
+    with mocked_aws(ec2=ec2) as (aws_object, mocked_yes_or_no):
+        inbound_security_group_rules, outbound_security_group_rules = (
+            aws_object.get_inbound_and_outbound_security_group_rules("sg-0001"))
+        assert [rule["SecurityGroupRuleId"] for rule in inbound_security_group_rules] == [
+            "sgr-0001", "sgr-0003", "sgr-0005"]
+        assert [rule["SecurityGroupRuleId"] for rule in outbound_security_group_rules] == ["sgr-0002", "sgr-0004"]
+        # All gotten in a single pass over the pages.
+        assert ec2.describe_security_group_rules_next_tokens == [None, "1", "2"]
+    ec2 = StubEc2(security_group_rule_pages=[SECURITY_GROUP_RULES[1:2]])
+    with mocked_aws(ec2=ec2) as (aws_object, mocked_yes_or_no):
+        assert aws_object.get_inbound_security_group_rules("sg-0001") is None
+        assert aws_object.get_outbound_security_group_rules("sg-0001") == SECURITY_GROUP_RULES[1:2]
+
+
+def test_index_security_group_rules() -> None:
+    security_group_rules_index = aws.Aws.index_security_group_rules(SECURITY_GROUP_RULES)
+    assert len(security_group_rules_index) == 4
+    https_security_group_rule = {"IpProtocol": "tcp", "FromPort": 443, "ToPort": 443,
+                                 "IpRanges": [{"CidrIp": "10.0.0.0/16", "Description": "HTTPS for testing"}]}
+    # Where more than one rule has the same values the first one is indexed.
+    found_security_group_rule = aws.Aws.find_inbound_security_group_rule(security_group_rules_index,
+                                                                         https_security_group_rule)
+    assert found_security_group_rule["SecurityGroupRuleId"] == "sgr-0001"
+    assert aws.Aws.find_outbound_security_group_rule(security_group_rules_index, https_security_group_rule) is None
+    # Same results from the index as from the list.
+    for security_group_rule in SECURITY_GROUP_RULES:
+        authorize_security_group_rule = {"IpProtocol": security_group_rule["IpProtocol"],
+                                         "FromPort": security_group_rule["FromPort"],
+                                         "ToPort": security_group_rule["ToPort"],
+                                         "IpRanges": [{"CidrIp": security_group_rule["CidrIpv4"]}]}
+        outbound = security_group_rule["IsEgress"]
+        assert (aws.Aws.find_security_group_rule(security_group_rules_index, authorize_security_group_rule, outbound)
+                == aws.Aws.find_security_group_rule(SECURITY_GROUP_RULES, authorize_security_group_rule, outbound))
+    assert aws.Aws.index_security_group_rules(None) == {}
+
+
+def test_get_security_group_rule_display_value() -> None:
+    aws.Aws._get_security_group_rule_display_value.cache_clear()
+    expected_display_values = [
+        "HTTPS | TCP | 443 | 10.0.0.0/16",
+        "All ICMP - IPv4 | Source Quench | N/A | 0.0.0.0/0",
+        "HTTPS | TCP | 443 | 10.0.0.0/16",
+        "Custom TCP | TCP | 8990 | 10.0.68.248/32",
+        "SSH | TCP | 22 | 10.0.0.0/16"
+    ]
+    for security_group_rule, expected_display_value in zip(SECURITY_GROUP_RULES, expected_display_values):
+        assert aws.Aws.get_security_group_rule_display_value(security_group_rule) == expected_display_value
+        # Same for the form of the rule as passed to authorize_security_group_ingress/egress.
+        authorize_security_group_rule = {"IpProtocol": security_group_rule["IpProtocol"],
+                                         "FromPort": security_group_rule["FromPort"],
+                                         "ToPort": security_group_rule["ToPort"],
+                                         "IpRanges": [{"CidrIp": security_group_rule["CidrIpv4"]}]}
+        assert aws.Aws.get_security_group_rule_display_value(authorize_security_group_rule) == expected_display_value
+    # Each distinct rule computed once, and the rest from the cache.
+    cache_info = aws.Aws._get_security_group_rule_display_value.cache_info()
+    assert cache_info.misses == 4
+    assert cache_info.hits == 6
+    assert aws.Aws.get_security_group_rule_display_value(
+        {"IpProtocol": "tcp", "FromPort": 1000, "ToPort": 2000, "CidrIpv4": "10.0.0.0/16"}) == (
+        "Custom TCP | TCP | 1000 - 2000 | 10.0.0.0/16")
+    assert aws.Aws.get_security_group_rule_display_value(
+        {"IpProtocol": "icmp", "FromPort": -1, "ToPort": -1, "CidrIpv4": "0.0.0.0/0"}) == (
+        "Custom ICMP - IPv4 | ICMP | All | 0.0.0.0/0")
+
+
+def test_get_customer_managed_kms_keys_all_pages() -> None:
+    kms = StubKms([["k1", "k2"], ["k3"], ["k4", "k5"]], customer_key_ids=["k2", "k3", "k5"])
+    with mocked_aws(kms=kms) as (aws_object, _):
+        assert aws_object.get_customer_managed_kms_keys() == ["k2", "k3", "k5"]
+
+
+def test_find_iam_user_name() -> None:
+    iam = StubIam(["cgap-other", "c4-iam-main-stack-federated", "C4-IAM-Main-Stack-Federated-Upper"])
+    with mocked_aws(iam=iam) as (aws_object, _):
+        # A plain user name is looked up directly, without listing all users.
+        assert aws_object.find_iam_user_name("c4-iam-main-stack-federated") == "c4-iam-main-stack-federated"
+        assert iam.list_users_calls == 0
+        assert aws_object.find_iam_user_name(".*-federated") == "c4-iam-main-stack-federated"
+        assert iam.list_users_calls == 1
+        # The user found directly (case-insensitively) must still match the (case-sensitive) pattern.
+        assert aws_object.find_iam_user_name("C4-IAM-Main-Stack-Federated") == "C4-IAM-Main-Stack-Federated-Upper"
+        assert iam.list_users_calls == 2
+        assert aws_object.find_iam_user_name("cgap-supertest") is None
@@ -0,0 +1,44 @@
+import mock
+from dcicutils import cloudformation_utils
+from dcicutils.qa_utils import MockBoto3, MockBotoCloudFormationClient, MockBotoCloudFormationStack
+from src.auto.utils import aws, aws_context
+from .aws_testing_utils import mocked_establish_credentials
+
+
+def setup_mocked_stacks(mocked_boto: MockBoto3, stacks: dict) -> None:
+    MockBotoCloudFormationClient.setup_boto3_mocked_stacks(mocked_boto, mocked_stacks=[
+        MockBotoCloudFormationStack(stack_name,
+                                    mock_outputs=[{"OutputKey": key, "OutputValue": value}
+                                                  for key, value in stack_outputs.items()])
+        for stack_name, stack_outputs in stacks.items()
+    ])
+
+
+def test_get_stack_output_value() -> None:
+    mocked_boto = MockBoto3()
+    setup_mocked_stacks(mocked_boto, {
+        "c4-network-stack": {"VPC": "vpc-1234", "PrivateSubnetA": "subnet-abcd"},
+        "c4-datastore-stack": {"RDSHostname": "rds.example.com", "RDSPort": "5432"}
+    })
+    with mock.patch.object(cloudformation_utils, "boto3", mocked_boto):
+        with mock.patch.object(aws_context.AwsContext, "establish_credentials", mocked_establish_credentials):
+            aws_object = aws.Aws()
+            assert aws_object.get_stack_output_value("c4-network-stack", "VPC") == "vpc-1234"
+            assert aws_object.get_stack_output_value("c4-datastore-stack", "RDSHostname") == "rds.example.com"
+            assert aws_object.get_stack_output_value("c4-datastore-stack", "RDSPort") == "5432"
+            assert aws_object.get_stack_output_value("c4-datastore-stack", "NoSuchOutput") is None
+
+
+def test_get_stack_output_value_duplicate_key() -> None:
+    mocked_boto = MockBoto3()
+    setup_mocked_stacks(mocked_boto, {
+        "c4-network-stack": {"VPC": "vpc-1234", "Dup": "dup-1"},
+        "c4-other-network-stack": {"Dup": "dup-2"}
+    })
+    with mock.patch.object(cloudformation_utils, "boto3", mocked_boto):
+        with mock.patch.object(aws_context.AwsContext, "establish_credentials", mocked_establish_credentials):
+            aws_object = aws.Aws()
+            # An output key name duplicated across stacks does not affect looking up any other one.
+            assert aws_object.get_stack_output_value("c4-network-stack", "VPC") == "vpc-1234"
+            # And for the duplicated one itself the last one found is used, as with find_stack_outputs.
+            assert aws_object.get_stack_output_value("c4-other-network-stack", "Dup") == "dup-2"
@@ -0,0 +1,99 @@
+import mock
+import os
+import pytest
+import subprocess
+from src.auto.utils import misc_utils
+from src.auto.utils.misc_utils import (_expand_json_template_in_place, _parse_script_exported_variable,
+                                       get_script_exported_variable, print_dictionary_as_table)
+
+
+def get_script_exported_variable_via_bash(shell_script_file: str, env_variable_name: str) -> str:
+    command = f"unset {env_variable_name} ; source {shell_script_file} ; echo ${env_variable_name}"
+    result = subprocess.run(command, shell=True, encoding="utf-8", capture_output=True, executable="/bin/bash")
+    return result.stdout.strip() or None
+
+
+@pytest.mark.skipif(not os.path.isfile("/bin/bash"), reason="Requires /bin/bash.")
+@pytest.mark.parametrize("shell_script_content", [
+    "ENV_NAME=cgap-supertest",
+    "export ENV_NAME=cgap-supertest",
+    "# Comment\n\nENV_NAME=first\nENV_NAME=second",
+    "ENV_NAME=",
+    "OTHER_NAME=cgap-supertest",
+    "ENV_NAME=~",
+    "ENV_NAME=~/cgap-supertest",
+    "ENV_NAME=cgap-supertest:~/more",
+    "ENV_NAME='~'",
+    "ENV_NAME=$HOME",
+    "ENV_NAME=${HOME}/cgap-supertest",
+    "OTHER_NAME=cgap\nENV_NAME=$OTHER_NAME-supertest",
+    "ENV_NAME=\"cgap-supertest\"",
+    "ENV_NAME='cgap-supertest'",
+    "ENV_NAME=\"cgap supertest\"",
+    "ENV_NAME='$HOME'",
+    "ENV_NAME=\"$HOME\"",
+    "ENV_NAME=cgap\\ supertest",
+    "ENV_NAME=cgap\\$supertest",
+    "ENV_NAME=\"cgap\\\"supertest\""
+])
+def test_get_script_exported_variable_same_as_bash(shell_script_content: str, tmp_path) -> None:
+    shell_script_file = os.path.join(tmp_path, "test_script.sh")
+    with open(shell_script_file, "w") as shell_script_fp:
+        shell_script_fp.write(shell_script_content + "\n")
+    expected_value = get_script_exported_variable_via_bash(shell_script_file, "ENV_NAME")
+    parsed, parsed_value = _parse_script_exported_variable(shell_script_file, "ENV_NAME")
+    if parsed:
+        assert parsed_value == expected_value
+    assert get_script_exported_variable(shell_script_file, "ENV_NAME") == expected_value
+
+
+def test_parse_script_exported_variable_not_parsed_for_tilde(tmp_path) -> None:
+    shell_script_file = os.path.join(tmp_path, "test_script.sh")
+    with open(shell_script_file, "w") as shell_script_fp:
+        shell_script_fp.write("ENV_NAME=~/cgap-supertest\n")
+    assert _parse_script_exported_variable(shell_script_file, "ENV_NAME") == (False, None)
+
+
+def test_expand_json_template_in_place() -> None:
+    template_substitutions = {"<account-number>": "1234567890", "<env-name>": "cgap-supertest", "<key>": "s3"}
+    template_json = {
+        "account_number": "<account-number>",
+        "<key>": {"bucket": {"encryption": True, "prefix": "<env-name>"}},
+        "envs": ["<env-name>", "<env-name>-other", {"name": "<env-name>"}],
+        "count": 2
+    }
+    nested_json = template_json["envs"]
+    expanded_json = _expand_json_template_in_place(template_json, template_substitutions)
+    assert expanded_json == {
+        "account_number": "1234567890",
+        "s3": {"bucket": {"encryption": True, "prefix": "cgap-supertest"}},
+        "envs": ["cgap-supertest", "<env-name>-other", {"name": "cgap-supertest"}],
+        "count": 2
+    }
+    # Substituted in place, with the keys in their original order.
+    assert expanded_json is template_json
+    assert expanded_json["envs"] is nested_json
+    assert list(expanded_json.keys()) == ["account_number", "s3", "envs", "count"]
+    assert _expand_json_template_in_place("<env-name>", template_substitutions) == "cgap-supertest"
+
+
+def test_print_dictionary_as_table() -> None:
+    with mock.patch.object(misc_utils, "PRINT") as mocked_print:
+        print_dictionary_as_table("Name", "Value", {"b_name": "value", "a": "longer value", "c": 3},
+                                  lambda name, value: f"<{value}>" if name == "c" else value)
+        assert mocked_print.call_args[0][0] == (
+            "+--------+--------------+\n"
+            "| Name   | Value        |\n"
+            "+--------+--------------+\n"
+            "| a      | longer value |\n"
+            "| b_name | value        |\n"
+            "| c      | <3>          |\n"
+            "+--------+--------------+")
+        print_dictionary_as_table("Name", "Value", {"b": "2", "a": "1"}, None, sort=False)
+        assert mocked_print.call_args[0][0] == (
+            "+------+-------+\n"
+            "| Name | Value |\n"
+            "+------+-------+\n"
+            "| b    | 2     |\n"
+            "| a    | 1     |\n"
+            "+------+-------+")
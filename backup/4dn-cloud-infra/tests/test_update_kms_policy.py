@@ -1,5 +1,5 @@
 import mock
-from dcicutils.qa_utils import MockBoto3
+from dcicutils.qa_utils import MockBoto3, MockBoto3Iam
 from dcicutils.diff_utils import DiffManager
 from src.auto.update_kms_policy.cli import main
 from src.auto.utils import aws, aws_context
@@ -68,6 +68,21 @@ class Input:
     }
 
 
+class MockBoto3IamListRolesPaginator:
+
+    def __init__(self, iam: MockBoto3Iam) -> None:
+        self._iam = iam
+
+    def paginate(self) -> list:
+        # N.B. The mocked list_roles returns all roles at once, i.e. as a single page.
+        return [self._iam.list_roles()]
+
+
+def mocked_iam_get_paginator(self, operation_name: str) -> MockBoto3IamListRolesPaginator:
+    assert operation_name == "list_roles"
+    return MockBoto3IamListRolesPaginator(self)
+
+
 def test_update_kms_policy() -> None:
 
     mocked_boto = MockBoto3()
@@ -79,7 +94,8 @@ def test_update_kms_policy() -> None:
 
     with setup_aws_credentials_dir(Input.aws_access_key_id,
                                    Input.aws_secret_access_key, Input.aws_region) as aws_credentials_dir, \
-         mock.patch.object(aws_context, "boto3", mocked_boto), mock.patch.object(aws, "boto3", mocked_boto), \
+         mock.patch.object(aws_context, "boto3", mocked_boto), \
+         mock.patch.object(MockBoto3Iam, "get_paginator", mocked_iam_get_paginator, create=True), \
          mock.patch("builtins.input") as mocked_input:
 
         mocked_input.return_value = "yes"
@@ -56,14 +56,12 @@ def route_secrets():
         return {'exception': str(e)}
 
 @app.route('/secrets-two')
-def route_env():
-    print('foo')
+def route_secrets_two():
     try:
         apply_identity_name()
         with assumed_identity(identity_kind=IDENTITY_ENV_NAME):
             return dict(os.environ)
     except Exception as e:
-        print('goo')
         return {'exception': str(e)}
 
 @app.route('/apply-identity')
@@ -22,10 +22,14 @@
 
 import argparse
 import boto3
+import concurrent.futures
 import json
 import re
 from aws_utils import (obfuscate, should_obfuscate, validate_aws)
 
+# Maximum number of concurrent get_secret_value calls (the default boto3 client connection pool size).
+GET_SECRET_VALUE_MAX_WORKERS = 10
+
 
 def print_aws_secrets(secret_name_pattern: str = None,
                       secret_key_name_pattern: str = None,
@@ -57,24 +61,42 @@ def print_aws_secrets(secret_name_pattern: str = None,
         secret_name_pattern = ".*" + secret_name_pattern[1:]
     if secret_key_name_pattern and secret_key_name_pattern.startswith("*"):
         secret_key_name_pattern = ".*" + secret_key_name_pattern[1:]
+    secret_name_regex = re.compile(secret_name_pattern, re.IGNORECASE) if secret_name_pattern else None
+    secret_key_name_regex = re.compile(secret_key_name_pattern, re.IGNORECASE) if secret_key_name_pattern else None
 
     secrets_manager = boto3.client('secretsmanager', aws_access_key_id=access_key, aws_secret_access_key=secret_key, region_name=region)
-    for secret in sorted(secrets_manager.list_secrets()["SecretList"], key=lambda key: key["Name"].lower()):
+    # N.B. Paginated since list_secrets returns (by default) at most 100 secrets per call.
+    secrets = [secret for page in secrets_manager.get_paginator("list_secrets").paginate()
+               for secret in page["SecretList"]]
+    secrets.sort(key=lambda key: key["Name"].lower())
+    secret_names = []
+    for secret in secrets:
         #
         # This secret_name is the secret *name* (in contrast to a secret *key* name).
         #
         secret_name = secret["Name"]
-        if secret_name_pattern and not re.search(secret_name_pattern, secret_name, re.IGNORECASE):
+        if secret_name_regex and not secret_name_regex.search(secret_name):
             continue
-        print(secret_name)
-        if secret_key_name_pattern:
-            secret_values = secrets_manager.get_secret_value(SecretId=secret_name)
-            secret_values_json = json.loads(secret_values["SecretString"])
+        secret_names.append(secret_name)
+
+    def get_secret_values_json(secret_name: str) -> dict:
+        secret_values = secrets_manager.get_secret_value(SecretId=secret_name)
+        return json.loads(secret_values["SecretString"])
+
+    if not secret_key_name_pattern:
+        for secret_name in secret_names:
+            print(secret_name)
+        return
+
+    # Get the secret values concurrently (boto3 clients are thread-safe); map yields them in secret name order.
+    with concurrent.futures.ThreadPoolExecutor(max_workers=GET_SECRET_VALUE_MAX_WORKERS) as executor:
+        for secret_name, secret_values_json in zip(secret_names, executor.map(get_secret_values_json, secret_names)):
+            print(secret_name)
             for secret_key_name in sorted(secret_values_json.keys(), key=lambda key: key.lower()):
                 #
                 # This secret_key_name is an individual secret key name (for the given secret_name).
                 #
-                if not re.search(secret_key_name_pattern, secret_key_name, re.IGNORECASE):
+                if not secret_key_name_regex.search(secret_key_name):
                     continue
                 secret_value = secret_values_json[secret_key_name]
                 if should_obfuscate(secret_key_name) and not show:
@@ -6,30 +6,31 @@
 
 import boto3
 import os
-import re
 
 
 def obfuscate(value: str) -> str:
     return value[0:1] + "*******" if value is not None and len(value) > 0 else ""
 
 
+SECRET_KEY_NAMES_FOR_OBFUSCATION = (
+    "secret",
+    "secrt",
+    "password",
+    "passwd",
+    "crypt"
+)
+
+
 def should_obfuscate(key: str) -> bool:
     """
     Returns True if the given key looks like it represents a secret value.
     N.B.: Dumb implementation. Just sees if it contains "secret" or "password"
     or "crypt" some obvious variants (case-insensitive), i.e. whatever is
-    in the SECRET_KEY_NAMES_FOR_OBFUSCATION list, which can be a regular
-    expression. Add more to SECRET_KEY_NAMES_FOR_OBFUSCATION if/when needed.
+    in the SECRET_KEY_NAMES_FOR_OBFUSCATION list, which are simple (lower case)
+    substrings. Add more to SECRET_KEY_NAMES_FOR_OBFUSCATION if/when needed.
     """
-    SECRET_KEY_NAMES_FOR_OBFUSCATION = [
-        ".*secret.*",
-        ".*secrt.*",
-        ".*password.*",
-        ".*passwd.*",
-        ".*crypt.*"
-    ]
-    secret_key_names_regex = map(lambda regex: re.compile(regex, re.IGNORECASE), SECRET_KEY_NAMES_FOR_OBFUSCATION)
-    return any(regex.match(key) for regex in secret_key_names_regex)
+    key = key.lower()
+    return any(secret_key_name in key for secret_key_name in SECRET_KEY_NAMES_FOR_OBFUSCATION)
 
 
 def validate_aws(access_key: str = None, secret_key: str = None, region: str = None, display: bool = True) -> [str, str, str]: